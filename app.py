@@ -1,20 +1,113 @@
-import gradio as gr
+import time
+STARTUP_TIME = time.time()
+
 import sys
 import os
-import time
+import threading
 from datetime import datetime
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
 
-from src.model_loader import CodeGenerationModel
 from src.core.logger import setup_logger
 
 logger = setup_logger(__name__)
 
-# Load the trained model
-logger.info("Loading trained WikiSQL model...")
-model = CodeGenerationModel(model_name_or_path="models/trained_wikisql_model")
-logger.info("Model loaded successfully!")
+# Per-phase cold start timings, logged and served by /health
+startup_phases = {}
+
+def record_phase(name, phase_start):
+    elapsed = time.time() - phase_start
+    startup_phases[name] = round(elapsed, 3)
+    logger.info(f"Startup phase '{name}' took {elapsed:.2f}s")
+
+phase_start = time.time()
+import gradio as gr
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+# TensorFlow and Transformers are only imported by the background loader (src.model_loader)
+from src.batching import MicroBatcher
+from src.response_cache import ResponseCache
+from src.core.fingerprint import CheckpointWatcher
+from src.example_prompts import APP_EXAMPLES
+record_phase("import_ui", phase_start)
+
+# Checkpoints selectable in the UI; loaded on first use and evicted LRU past the memory budget
+MODELS = {
+    "wikisql": "models/trained_wikisql_model",
+    "sql": "models/trained_sql_model",
+}
+DEFAULT_MODEL = "wikisql"
+MODEL_MEMORY_BUDGET_MB = 2500
+
+# Micro-batching: concurrent requests arriving within the window share one decode
+MAX_BATCH_SIZE = 8
+BATCH_WINDOW_MS = 10
+
+# Response cache for repeated schema + question pairs
+CACHE_SIZE = 2048
+CACHE_TTL_SECONDS = 6 * 60 * 60
+
+# Filled in by load_model() once the server is already accepting connections
+pool = None
+batchers = {}  # model name -> MicroBatcher, created on first request for that model
+batchers_lock = threading.Lock()
+model_ready = threading.Event()
+model_error = None
+
+# One invalidation hook for a retrained checkpoint: the pool reloads it and the cache drops its answers
+checkpoint_watcher = CheckpointWatcher(MODELS)
+response_cache = ResponseCache(maxsize=CACHE_SIZE, ttl_seconds=CACHE_TTL_SECONDS, watcher=checkpoint_watcher)
+
+def load_model():
+    """Import the ML stack, load the default model and warm it up (runs in a background thread)"""
+    global pool, model_error
+    try:
+        phase_start = time.time()
+        from src.model_pool import ModelPool
+        record_phase("import_runtime", phase_start)
+        
+        phase_start = time.time()
+        logger.info(f"Loading default model '{DEFAULT_MODEL}'...")
+        pool = ModelPool(MODELS, memory_budget_mb=MODEL_MEMORY_BUDGET_MB, watcher=checkpoint_watcher)
+        model = pool.get(DEFAULT_MODEL)
+        logger.info("Model loaded successfully!")
+        record_phase("load_model", phase_start)
+        
+        # The first generate call builds the TF graphs; pay for it before users do
+        phase_start = time.time()
+        model.generate_batch([parse_input(examples[0][0])], max_length=128)
+        record_phase("warm_up", phase_start)
+        
+        model_ready.set()
+        logger.info(f"Model ready {time.time() - STARTUP_TIME:.2f}s after process start")
+    except Exception as e:
+        model_error = str(e)
+        logger.error(f"Model failed to load: {e}")
+
+def health_check():
+    """Readiness probe: 200 once the model is warm, 503 while booting or after a failed load"""
+    if model_ready.is_set():
+        status = "ready"
+    elif model_error is not None:
+        status = "failed"
+    else:
+        status = "booting"
+    return JSONResponse(
+        {"status": status, "error": model_error, "startup_phases": startup_phases,
+         "uptime_s": round(time.time() - STARTUP_TIME, 3)},
+        status_code=200 if status == "ready" else 503,
+    )
+
+def get_batcher(model_name):
+    """MicroBatcher for one model; the pool (re)loads the model if it was evicted"""
+    with batchers_lock:
+        if model_name not in batchers:
+            batchers[model_name] = MicroBatcher(
+                lambda prompts: pool.get(model_name).generate_batch(prompts, max_length=128),
+                max_batch_size=MAX_BATCH_SIZE,
+                max_wait_ms=BATCH_WINDOW_MS,
+            )
+        return batchers[model_name]
 
 def parse_input(user_input):
     """
@@ -30,12 +123,13 @@ def parse_input(user_input):
         default_schema = "CREATE TABLE table (column TEXT, value REAL);"
         return f"{default_schema} Question: {user_input}"
 
-def generate_sql(user_input, include_schema=True):
+def generate_sql(user_input, model_name=DEFAULT_MODEL, include_schema=True):
     """
     Generate SQL query from natural language input with schema context
     
     Args:
         user_input: Natural language question or full CREATE TABLE + Question format
+        model_name: Key into MODELS (default: DEFAULT_MODEL)
         include_schema: Whether to expect schema in input (default: True)
     
     Returns:
@@ -48,8 +142,24 @@ def generate_sql(user_input, include_schema=True):
         # Parse input to ensure proper format
         formatted_input = parse_input(user_input)
         
-        # Generate SQL
-        sql_query = model.generate(prompt=formatted_input, max_length=128)
+        if model_name not in MODELS:
+            return f"Error: unknown model {model_name!r}", "✗ Generation failed"
+        
+        sql_query = response_cache.get(formatted_input, namespace=model_name)
+        if sql_query is not None:
+            elapsed = time.time() - start_time
+            logger.info(f"Cache hit in {elapsed*1e6:.0f}µs: {sql_query}")
+            return sql_query, f"✓ Served from cache in {elapsed*1e6:.0f}µs"
+        
+        if not model_ready.is_set():
+            if model_error is not None:
+                return f"Error: model failed to load ({model_error})", "✗ Model unavailable"
+            return "", "⏳ Model is still loading, please try again in a few seconds"
+        
+        # Generate SQL (batched with any other requests in flight)
+        epoch = response_cache.epoch(model_name)
+        sql_query = get_batcher(model_name).generate(formatted_input)
+        response_cache.put(formatted_input, sql_query, namespace=model_name, epoch=epoch)
         
         elapsed = time.time() - start_time
         logger.info(f"Generated SQL in {elapsed:.2f}s: {sql_query}")
@@ -60,26 +170,22 @@ def generate_sql(user_input, include_schema=True):
         logger.error(f"Error generating SQL: {e}")
         return f"Error: {str(e)}", "✗ Generation failed"
 
+def get_serving_stats():
+    """Counters for tuning the cache size, batching window and model memory budget"""
+    with batchers_lock:
+        batcher_stats = {name: b.stats() for name, b in batchers.items()}
+    return {
+        "ready": model_ready.is_set(),
+        "startup_phases": startup_phases,
+        "cache": response_cache.stats(),
+        "models": pool.stats() if pool is not None else None,
+        "batchers": batcher_stats,
+    }
+
 # Professional example queries with schema context
-examples = [
-    ["""CREATE TABLE employees (Name TEXT, Department TEXT, Salary REAL, Years_Experience REAL);
-Question: What are the names of employees in the Engineering department?"""],
-    
-    ["""CREATE TABLE products (Product_Name TEXT, Category TEXT, Price REAL, Stock_Quantity REAL);
-Question: Which products cost more than 100 dollars?"""],
-    
-    ["""CREATE TABLE orders (Order_ID REAL, Customer_Name TEXT, Order_Date TEXT, Total_Amount REAL);
-Question: What is the total amount of all orders?"""],
-    
-    ["""CREATE TABLE students (Student_Name TEXT, Grade TEXT, GPA REAL, Graduation_Year REAL);
-Question: How many students have a GPA greater than 3.5?"""],
-    
-    ["""CREATE TABLE movies (Title TEXT, Director TEXT, Year REAL, Rating REAL, Genre TEXT);
-Question: What movies were directed by Christopher Nolan?"""],
-    
-    ["""CREATE TABLE sales (Region TEXT, Product TEXT, Revenue REAL, Units_Sold REAL);
-Question: What is the average revenue per region?"""],
-]
+examples = [[prompt] for prompt in APP_EXAMPLES]
+
+ui_start = time.time()
 
 # Custom CSS for professional styling
 custom_css = """
@@ -120,6 +226,13 @@ with gr.Blocks(title="WikiSQL Text-to-SQL Generator", theme=gr.themes.Soft(), cs
         with gr.Column(scale=3):
             gr.Markdown("### 📝 Input")
             
+            model_choice = gr.Dropdown(
+                choices=list(MODELS),
+                value=DEFAULT_MODEL,
+                label="Model",
+                info="Other checkpoints load on first use"
+            )
+            
             input_text = gr.Textbox(
                 label="Schema + Question",
                 placeholder="""Enter in format:
@@ -201,6 +314,10 @@ OR just enter a question (default schema will be used)""",
             </div>
             """)
     
+    with gr.Accordion("⚙️ Serving Stats", open=False):
+        serving_stats = gr.JSON(label="Response cache, model pool and micro-batchers")
+        refresh_stats_btn = gr.Button("🔄 Refresh", size="sm")
+    
     gr.Markdown("""
     ---
     ### 📖 How to Use
@@ -216,7 +333,7 @@ OR just enter a question (default schema will be used)""",
     # Event handlers
     generate_btn.click(
         fn=generate_sql,
-        inputs=input_text,
+        inputs=[input_text, model_choice],
         outputs=[output_text, status_text]
     )
     
@@ -226,17 +343,33 @@ OR just enter a question (default schema will be used)""",
         outputs=[input_text, output_text, status_text]
     )
     
+    refresh_stats_btn.click(
+        fn=get_serving_stats,
+        inputs=None,
+        outputs=serving_stats
+    )
+    
     input_text.submit(
         fn=generate_sql,
-        inputs=input_text,
+        inputs=[input_text, model_choice],
         outputs=[output_text, status_text]
     )
 
 if __name__ == "__main__":
+    record_phase("build_ui", ui_start)
     logger.info("Starting Gradio app...")
+    phase_start = time.time()
+    # Let up to MAX_BATCH_SIZE handlers wait on the batcher at once
+    demo.queue(default_concurrency_limit=MAX_BATCH_SIZE)
     demo.launch(
         server_name="0.0.0.0",
         server_port=7860,
         share=True,  # Set to True for public Gradio link
-        show_error=True
+        show_error=True,
+        prevent_thread_lock=True,  # return once the port is bound so the model can load behind it
+        app_kwargs={"routes": [APIRoute("/health", health_check, methods=["GET"])]},
     )
+    record_phase("bind_server", phase_start)
+    
+    threading.Thread(target=load_model, name="model-loader", daemon=True).start()
+    demo.block_thread()
@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import statistics
+import time
+from src.model_loader import CodeGenerationModel, DEFAULT_BUCKETS
+from src.core.logger import setup_logger
+from examples.wikisql_validation import load_validation_data, build_prompt
+
+logger = setup_logger(__name__)
+
+def time_requests(model, prompts, max_length):
+    """Serve prompts one at a time like app.py does and record per-request latency"""
+    latencies = []
+    outputs = []
+    for prompt in prompts:
+        start_time = time.perf_counter()
+        outputs.append(model.generate_batch([prompt], max_length=max_length)[0])
+        latencies.append(time.perf_counter() - start_time)
+    return latencies, outputs
+
+def summarize(name, latencies):
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    logger.info(f"{name}: mean {statistics.mean(latencies)*1000:.1f}ms | "
+                f"p50 {cuts[49]*1000:.1f}ms | p95 {cuts[94]*1000:.1f}ms | "
+                f"max {max(latencies)*1000:.1f}ms | stdev {statistics.stdev(latencies)*1000:.1f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare eager and XLA-compiled generation latency on WikiSQL validation prompts")
+    parser.add_argument("--model", default="models/trained_wikisql_model")
+    parser.add_argument("--num-prompts", type=int, default=200)
+    parser.add_argument("--max-length", type=int, default=128)
+    parser.add_argument("--buckets", type=int, nargs="+", default=list(DEFAULT_BUCKETS))
+    args = parser.parse_args()
+
+    validation_data = load_validation_data()
+    num_prompts = min(args.num_prompts, len(validation_data))
+    prompts = [build_prompt(example) for example in validation_data.select(range(num_prompts))]
+    logger.info(f"Benchmarking {num_prompts} validation prompts")
+
+    model = CodeGenerationModel(model_name_or_path=args.model)
+    eager_latencies, eager_outputs = time_requests(model, prompts, args.max_length)
+
+    start_time = time.perf_counter()
+    model.compile_generation(buckets=args.buckets, max_length=args.max_length)
+    logger.info(f"Warm-up of {len(args.buckets)} buckets took {time.perf_counter() - start_time:.2f}s")
+    compiled_latencies, compiled_outputs = time_requests(model, prompts, args.max_length)
+
+    agreement = sum(e == c for e, c in zip(eager_outputs, compiled_outputs)) / num_prompts
+
+    logger.info(f"\n{'='*50}")
+    logger.info("LATENCY PER REQUEST:")
+    summarize("Eager   ", eager_latencies)
+    summarize("Compiled", compiled_latencies)
+    logger.info(f"Speedup (mean): {statistics.mean(eager_latencies)/statistics.mean(compiled_latencies):.2f}x")
+    logger.info(f"Identical outputs: {agreement*100:.2f}%")
+    # The compiled path is only a speedup; any output difference is a bug
+    if agreement < 1:
+        for prompt, eager, compiled in zip(prompts, eager_outputs, compiled_outputs):
+            if eager != compiled:
+                logger.error(f"Compiled output differs for {prompt!r}: eager {eager!r}, compiled {compiled!r}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
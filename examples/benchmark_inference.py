@@ -0,0 +1,149 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import itertools
+import json
+import resource
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.model_loader import CodeGenerationModel
+from src.batching import MicroBatcher
+from src.example_prompts import APP_EXAMPLES
+from src.core.fingerprint import fingerprint_directory
+from src.core.logger import setup_logger
+from examples.quantization_report import current_rss_mb
+
+logger = setup_logger(__name__)
+
+def load_prompts(prompt_set, num_prompts):
+    if prompt_set == "app":
+        prompts = APP_EXAMPLES
+    else:
+        from examples.wikisql_validation import load_validation_data, build_prompt
+        validation_data = load_validation_data()
+        prompts = [build_prompt(example) for example in validation_data.select(range(min(num_prompts, len(validation_data))))]
+    # Cycle short prompt sets so every configuration replays the same number of requests
+    return list(itertools.islice(itertools.cycle(prompts), num_prompts))
+
+def latency_summary(latencies):
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {"mean": statistics.mean(latencies) * 1000, "p50": cuts[49] * 1000,
+            "p95": cuts[94] * 1000, "p99": cuts[98] * 1000}
+
+def count_tokens(model, outputs):
+    return sum(len(ids) for ids in model.tokenizer(outputs)["input_ids"])
+
+def run_batched(model, prompts, batch_size, num_beams, max_length):
+    """Fixed-size batches back to back; every request in a batch waits for the whole batch"""
+    latencies = []
+    outputs = []
+    start_time = time.perf_counter()
+    for start in range(0, len(prompts), batch_size):
+        batch = prompts[start:start + batch_size]
+        batch_start = time.perf_counter()
+        outputs.extend(model.generate_batch(batch, max_length=max_length, num_beams=num_beams))
+        latencies.extend([time.perf_counter() - batch_start] * len(batch))
+    return time.perf_counter() - start_time, latencies, outputs
+
+def run_concurrent(model, prompts, concurrency, max_batch_size, num_beams, max_length):
+    """concurrency clients sending one request at a time through a MicroBatcher, like app.py"""
+    batcher = MicroBatcher(lambda batch: model.generate_batch(batch, max_length=max_length, num_beams=num_beams),
+                           max_batch_size=max_batch_size)
+
+    def client(client_prompts):
+        results = []
+        for prompt in client_prompts:
+            request_start = time.perf_counter()
+            output = batcher.generate(prompt)
+            results.append((time.perf_counter() - request_start, output))
+        return results
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        per_client = list(pool.map(client, [prompts[i::concurrency] for i in range(concurrency)]))
+    wall_time = time.perf_counter() - start_time
+    stats = batcher.stats()
+    batcher.close()
+    results = [result for client_results in per_client for result in client_results]
+    return wall_time, [latency for latency, _ in results], [output for _, output in results], stats
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep CodeGenerationModel throughput and latency; writes JSON")
+    parser.add_argument("--model", default="models/trained_wikisql_model")
+    parser.add_argument("--prompts", choices=["wikisql", "app"], default="wikisql",
+                        help="WikiSQL validation prompts or the app.py examples")
+    parser.add_argument("--num-prompts", type=int, default=64, help="requests replayed per configuration")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--num-beams", type=int, nargs="+", default=[1, 5])
+    parser.add_argument("--max-lengths", type=int, nargs="+", default=[128])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8],
+                        help="simultaneous clients going through a MicroBatcher")
+    parser.add_argument("--output", default="logs/benchmark_inference.json")
+    args = parser.parse_args()
+
+    prompts = load_prompts(args.prompts, args.num_prompts)
+    load_start = time.perf_counter()
+    model = CodeGenerationModel(model_name_or_path=args.model)
+    load_time = time.perf_counter() - load_start
+    # Build the TF graphs once so the first configuration isn't charged for tracing
+    model.generate_batch(prompts[:1], max_length=min(args.max_lengths))
+
+    results = []
+    for num_beams, max_length in itertools.product(args.num_beams, args.max_lengths):
+        runs = [("batch", size) for size in args.batch_sizes] + [("concurrent", n) for n in args.concurrency]
+        for mode, value in runs:
+            batcher_stats = None
+            if mode == "batch":
+                wall_time, latencies, outputs = run_batched(model, prompts, value, num_beams, max_length)
+            else:
+                wall_time, latencies, outputs, batcher_stats = run_concurrent(
+                    model, prompts, value, max(args.batch_sizes), num_beams, max_length)
+            result = {
+                "mode": mode,
+                "batch_size" if mode == "batch" else "concurrency": value,
+                "num_beams": num_beams,
+                "max_length": max_length,
+                "requests": len(prompts),
+                "wall_s": wall_time,
+                "requests_per_s": len(prompts) / wall_time,
+                "tokens_per_s": count_tokens(model, outputs) / wall_time,
+                "latency_ms": latency_summary(latencies),
+                "rss_mb": current_rss_mb(),
+            }
+            if batcher_stats is not None:
+                result["avg_batch_size"] = batcher_stats["avg_batch_size"]
+            results.append(result)
+            logger.info(f"{mode:>10}={value:<3} beams={num_beams} max_length={max_length}: "
+                        f"{result['requests_per_s']:.2f} req/s | {result['tokens_per_s']:.1f} tok/s | "
+                        f"p50 {result['latency_ms']['p50']:.1f}ms p95 {result['latency_ms']['p95']:.1f}ms "
+                        f"p99 {result['latency_ms']['p99']:.1f}ms")
+
+    report = {
+        "model": args.model,
+        "model_fingerprint": fingerprint_directory(args.model),
+        "git_commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "prompts": args.prompts,
+        "num_prompts": len(prompts),
+        "load_time_s": load_time,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3,  # KB on Linux
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Peak RSS {report['peak_rss_mb']:.0f}MB; report saved at {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import tempfile
+from src.dataset_builder import SQLDatasetBuilder
+from src.model_trainer import ModelTrainer
+from src.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def run_epoch(model, dataset_path, batch_size, bucket_by_length):
+    trainer = ModelTrainer(model_name_or_path=model, dataset_path=dataset_path)
+    history = trainer.train(epochs=1, batch_size=batch_size, bucket_by_length=bucket_by_length)
+    return history.history["examples_per_sec"][0]
+
+def main():
+    parser = argparse.ArgumentParser(description="One training epoch with fixed 128-token padding vs length-bucketed batches")
+    parser.add_argument("--model", default="google/flan-t5-base")
+    parser.add_argument("--num-examples", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    builder = SQLDatasetBuilder(tokenizer_name=args.model)
+    builder.wiqiSQL_dataset(max_examples=args.num_examples, use_schema=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        rates = {}
+        for bucket_by_length in (False, True):
+            path = os.path.join(tmp, "bucketed" if bucket_by_length else "fixed")
+            builder.save_dataset(output_path=path, dynamic_padding=bucket_by_length)
+            rates[bucket_by_length] = run_epoch(args.model, path, args.batch_size, bucket_by_length)
+
+    logger.info(f"Fixed padding: {rates[False]:.1f} examples/sec | length-bucketed: {rates[True]:.1f} examples/sec "
+                f"({rates[True] / rates[False]:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+import numpy as np
+from src.similarity import levenshtein_ratio
+from src.core.logger import setup_logger
+from examples.wikisql_validation import similarity
+from examples.compare_sql_canonicalizer import gold_pairs, load_prediction_pairs
+
+logger = setup_logger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch Levenshtein similarity vs the per-pair difflib loop")
+    parser.add_argument("--predictions", help="JSONL with 'expected' and 'predicted' fields; "
+                                              "defaults to rewrites of the validation gold queries")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pairs = load_prediction_pairs(args.predictions) if args.predictions else gold_pairs()
+    expected = [e for e, _ in pairs]
+    predicted = [p for _, p in pairs]
+    logger.info(f"Scoring {len(pairs)} (expected, predicted) pairs, best of {args.repeat}")
+
+    timings = {}
+    results = {}
+    for name, fn in (
+        ("difflib (per pair)", lambda: np.array([similarity(p, e) for p, e in pairs])),
+        ("levenshtein char (batch)", lambda: levenshtein_ratio(predicted, expected)),
+        ("levenshtein token (batch)", lambda: levenshtein_ratio(predicted, expected, level="token")),
+    ):
+        best = float("inf")
+        for _ in range(args.repeat):
+            start_time = time.perf_counter()
+            results[name] = fn()
+            best = min(best, time.perf_counter() - start_time)
+        timings[name] = best
+
+    baseline = timings["difflib (per pair)"]
+    logger.info(f"\n{'='*50}")
+    logger.info("SIMILARITY BENCHMARK:")
+    for name, elapsed in timings.items():
+        logger.info(f"{name:>26}: {elapsed*1000:8.1f}ms ({baseline/elapsed:.1f}x) | "
+                    f"mean similarity {results[name].mean()*100:.2f}%")
+
+if __name__ == "__main__":
+    main()
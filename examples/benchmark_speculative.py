@@ -0,0 +1,52 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+from src.model_loader import CodeGenerationModel
+from src.core.logger import setup_logger
+from examples.wikisql_validation import load_validation_data, build_prompt
+
+logger = setup_logger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare greedy and template-drafted speculative decoding on WikiSQL validation prompts")
+    parser.add_argument("--model", default="models/trained_wikisql_model")
+    parser.add_argument("--num-prompts", type=int, default=200)
+    parser.add_argument("--max-length", type=int, default=128)
+    parser.add_argument("--max-draft", type=int, default=8)
+    args = parser.parse_args()
+
+    validation_data = load_validation_data()
+    num_prompts = min(args.num_prompts, len(validation_data))
+    prompts = [build_prompt(example) for example in validation_data.select(range(num_prompts))]
+    logger.info(f"Benchmarking {num_prompts} validation prompts")
+
+    model = CodeGenerationModel(model_name_or_path=args.model)
+
+    start_time = time.perf_counter()
+    greedy_outputs = [model.generate_batch([prompt], max_length=args.max_length, num_beams=1)[0] for prompt in prompts]
+    greedy_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    speculative_outputs = model.generate_speculative(prompts, max_length=args.max_length, max_draft=args.max_draft)
+    speculative_time = time.perf_counter() - start_time
+
+    stats = model.speculative_stats
+    identical = sum(g == s for g, s in zip(greedy_outputs, speculative_outputs))
+    accept_rate = stats["accepted_tokens"] / stats["draft_tokens"] if stats["draft_tokens"] else 0.0
+
+    logger.info(f"\n{'='*50}")
+    logger.info("SPECULATIVE DECODING RESULTS:")
+    logger.info(f"Identical to greedy: {identical}/{num_prompts}")
+    logger.info(f"Accepted draft tokens: {stats['accepted_tokens']}/{stats['draft_tokens']} ({accept_rate*100:.2f}%)")
+    # Plain greedy needs one decoder call per generated token
+    logger.info(f"Decoder calls per query: {stats['decoder_calls']/num_prompts:.2f} "
+                f"(greedy: {stats['tokens']/num_prompts:.2f})")
+    logger.info(f"Greedy: {greedy_time/num_prompts*1000:.1f}ms per query")
+    logger.info(f"Speculative: {speculative_time/num_prompts*1000:.1f}ms per query")
+    logger.info(f"End-to-end speedup: {greedy_time/speculative_time:.2f}x")
+
+if __name__ == "__main__":
+    main()
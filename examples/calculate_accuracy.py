@@ -3,10 +3,7 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.model_loader import CodeGenerationModel
-from difflib import SequenceMatcher
-
-def calculate_similarity(str1, str2):
-    return SequenceMatcher(None, str1.lower(), str2.lower()).ratio() * 100
+from src.similarity import levenshtein_ratio
 
 def main():
     model = CodeGenerationModel(model_name_or_path="models/trained_sql_model")
@@ -36,10 +33,10 @@ def main():
     print("ACCURACY EVALUATION")
     print("="*100 + "\n")
     
-    for i, (prompt, expected) in enumerate(test_cases, 1):
-        generated = model.generate(prompt=prompt, max_length=100)
-        
-        similarity = calculate_similarity(expected, generated)
+    generations = model.generate_batch([prompt for prompt, _ in test_cases], max_length=100)
+    similarities = levenshtein_ratio(generations, [expected for _, expected in test_cases]) * 100
+    
+    for i, ((prompt, expected), generated, similarity) in enumerate(zip(test_cases, generations, similarities), 1):
         total_similarity += similarity
         
         is_exact = expected.lower().strip() == generated.lower().strip()
@@ -0,0 +1,84 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import json
+import time
+from src.sql_canonicalizer import sql_match
+from src.execution_evaluator import AGG_OPS
+from src.core.logger import setup_logger
+from examples.wikisql_validation import load_validation_data, normalization
+
+logger = setup_logger(__name__)
+
+def load_prediction_pairs(path):
+    """(expected, predicted) pairs from a JSONL file with 'expected' and 'predicted' fields"""
+    with open(path) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(row["expected"], row["predicted"]) for row in rows]
+
+def gold_pairs():
+    """Without predictions, compare each gold query against rewrites of itself and against its neighbour.
+
+    The known, intended disagreements between the two metrics are pinned in
+    tests/test_sql_canonicalizer.py.
+    """
+    gold = [example['sql']['human_readable'] for example in load_validation_data()]
+    pairs = []
+    for i, sql in enumerate(gold):
+        select, _, where = sql.partition(" WHERE ")
+        pairs.append((sql, sql.lower()))
+        pairs.append((sql, "  ".join(sql.split(" "))))
+        if where:
+            conditions = where.split(" AND ")
+            pairs.append((sql, f"{select} WHERE {' AND '.join(reversed(conditions))}"))
+            quoted = [f'{c.split(" = ")[0]} = "{c.split(" = ")[1]}"' if " = " in c else c for c in conditions]
+            pairs.append((sql, f"{select} WHERE {' AND '.join(quoted)}"))
+            # Operators split by a space, which models sometimes emit
+            pairs.append((sql, sql.replace("<=", "< =").replace(">=", "> =").replace("<>", "< >")))
+        aggregate = select.split(" ")[1]
+        if aggregate in AGG_OPS[1:]:
+            # Aggregates written with parentheses: SELECT COUNT(Player) FROM table
+            column, _, rest = sql[len(f"SELECT {aggregate} "):].partition(" FROM ")
+            pairs.append((sql, f"SELECT {aggregate}({column}) FROM {rest}"))
+        pairs.append((sql, gold[(i + 1) % len(gold)]))
+    return pairs
+
+def main():
+    parser = argparse.ArgumentParser(description="Check sql_match against normalization()-based exact match")
+    parser.add_argument("--predictions", help="JSONL with 'expected' and 'predicted' fields; "
+                                              "defaults to rewrites of the validation gold queries")
+    parser.add_argument("--repeat", type=int, default=5, help="timing passes over all pairs")
+    args = parser.parse_args()
+
+    pairs = load_prediction_pairs(args.predictions) if args.predictions else gold_pairs()
+    logger.info(f"Comparing {len(pairs)} (expected, predicted) pairs")
+
+    legacy_start = time.perf_counter()
+    for _ in range(args.repeat):
+        legacy = [normalization(predicted) == normalization(expected) for expected, predicted in pairs]
+    legacy_time = (time.perf_counter() - legacy_start) / args.repeat
+
+    canonical_start = time.perf_counter()
+    for _ in range(args.repeat):
+        canonical = [sql_match(predicted, expected) for expected, predicted in pairs]
+    canonical_time = (time.perf_counter() - canonical_start) / args.repeat
+
+    differing = [(pair, old) for pair, old, new in zip(pairs, legacy, canonical) if old != new]
+    for (expected, predicted), old in differing:
+        logger.info(f"\n{'=='*25}")
+        logger.info(f"Expected: {expected}")
+        logger.info(f"Predicted: {predicted}")
+        logger.info(f"normalization(): {'match' if old else 'no match'} | sql_match(): {'no match' if old else 'match'}")
+
+    logger.info(f"\n{'='*50}")
+    logger.info("CANONICALIZER REPORT:")
+    logger.info(f"Agreement: {(len(pairs) - len(differing))/len(pairs)*100:.2f}% ({len(differing)} differing pairs)")
+    logger.info(f"Exact Match: normalization() {sum(legacy)/len(pairs)*100:.2f}% | "
+                f"sql_match() {sum(canonical)/len(pairs)*100:.2f}%")
+    logger.info(f"Time per pair: normalization() {legacy_time/len(pairs)*1e6:.1f}µs | "
+                f"sql_match() {canonical_time/len(pairs)*1e6:.1f}µs ({legacy_time/canonical_time:.1f}x faster)")
+
+if __name__ == "__main__":
+    main()
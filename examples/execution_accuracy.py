@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import json
+import time
+from src.execution_evaluator import ExecutionEvaluator
+from src.sql_canonicalizer import sql_match
+from src.core.logger import setup_logger
+from examples.wikisql_validation import load_validation_data
+
+logger = setup_logger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Execution accuracy of WikiSQL validation predictions")
+    parser.add_argument("--predictions", help="JSONL with a 'predicted' field per validation example, in order; "
+                                              "defaults to the gold queries as a sanity check")
+    parser.add_argument("--timeout", type=float, default=1.0, help="seconds before a query is interrupted")
+    args = parser.parse_args()
+
+    validation_data = load_validation_data(columns=None)  # the table rows are executed against
+    if args.predictions:
+        with open(args.predictions) as f:
+            predictions = [json.loads(line)["predicted"] for line in f if line.strip()]
+    else:
+        predictions = validation_data['sql']
+        predictions = [sql['human_readable'] for sql in predictions]
+    num_examples = min(len(predictions), len(validation_data))
+    logger.info(f"Scoring {num_examples} predictions")
+
+    evaluator = ExecutionEvaluator(timeout_seconds=args.timeout)
+    start_time = time.perf_counter()
+    execution_match = 0
+    exact_match = 0
+    for example, pred_sql in zip(validation_data.select(range(num_examples)), predictions):
+        execution_match += evaluator.execution_match(example, pred_sql)
+        exact_match += sql_match(pred_sql, example['sql']['human_readable'])
+    elapsed = time.perf_counter() - start_time
+
+    stats = evaluator.stats
+    logger.info(f"\n{'='*50}")
+    logger.info("EXECUTION RESULTS:")
+    logger.info(f"Execution Accuracy: {execution_match/num_examples*100:.2f}%")
+    logger.info(f"Exact Match: {exact_match/num_examples*100:.2f}%")
+    logger.info(f"Total Examples: {num_examples}")
+    logger.info(f"Unparsable Predictions: {stats['parse_errors']} | Execution Errors: {stats['execution_errors']} | "
+                f"Timeouts: {stats['timeouts']}")
+    logger.info(f"Time: {elapsed:.2f}s total ({stats['tables_loaded']} tables loaded in {stats['load_time']:.2f}s, "
+                f"{stats['queries']} queries in {stats['query_time']:.2f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import json
+import multiprocessing
+import resource
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src.sql_canonicalizer import sql_match
+from src.similarity import levenshtein_ratio
+from src.prediction_store import PredictionStore
+from src.core.fingerprint import fingerprint_directory
+from src.core.logger import setup_logger
+from examples.wikisql_validation import load_validation_data, build_prompt
+
+logger = setup_logger(__name__)
+
+def current_rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+def export_variant(model_path, precision):
+    from src.quantization import load_quantized
+    load_quantized(model_path, precision)
+
+def evaluate_precision(model_path, precision, num_examples, max_length, num_beams, store_path=None):
+    """Runs in its own process so resident memory reflects only this variant.
+
+    Prompts already in the prediction store are scored from it; latency
+    percentiles cover only the prompts decoded in this run.
+    """
+    from src.model_loader import CodeGenerationModel
+    from src.quantization import tflite_dir
+
+    # TFLite variants only decode greedily
+    num_beams = num_beams if precision == "fp32" else 1
+    model = CodeGenerationModel(model_name_or_path=model_path, precision=precision, num_beams=num_beams)
+    loaded_rss = current_rss_mb()
+    validation_data = load_validation_data()
+    validation_data = validation_data.select(range(min(num_examples, len(validation_data))))
+    prompts = [build_prompt(example) for example in validation_data]
+
+    store = None
+    if store_path:
+        # fp32 shares wikisql_validation.py's key; an export is told apart by its own files
+        params = {"max_length": max_length, "num_beams": num_beams, "constrained": False, "adaptive": False}
+        if precision != "fp32":
+            params.update(precision=precision, export=fingerprint_directory(tflite_dir(model_path, precision)))
+        store = PredictionStore(store_path, model_path, params)
+    pred_sqls = store.get_many(prompts) if store is not None else [None] * len(prompts)
+
+    latencies = []
+    missing = [i for i, pred_sql in enumerate(pred_sqls) if pred_sql is None]
+    for i in missing:
+        start_time = time.perf_counter()
+        pred_sqls[i] = model.generate_batch([prompts[i]], max_length=max_length, num_beams=num_beams)[0]
+        latencies.append(time.perf_counter() - start_time)
+    if store is not None and missing:
+        store.put_many([prompts[i] for i in missing], [pred_sqls[i] for i in missing])
+
+    expected_sqls = [example['sql']['human_readable'] for example in validation_data]
+    exact_match = sum(sql_match(pred_sql, expected_sql) for pred_sql, expected_sql in zip(pred_sqls, expected_sqls))
+    latency_ms = None
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        latency_ms = {"mean": statistics.mean(latencies) * 1000, "p50": cuts[49] * 1000,
+                      "p95": cuts[94] * 1000, "p99": cuts[98] * 1000}
+    return {
+        "precision": precision,
+        "num_beams": num_beams,
+        "examples": len(prompts),
+        "decoded": len(latencies),
+        "exact_match": exact_match / len(prompts) * 100,
+        "similarity": float(levenshtein_ratio(pred_sqls, expected_sqls).mean()) * 100,
+        "latency_ms": latency_ms,
+        "rss_mb": loaded_rss,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3,  # KB on Linux
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fp32 / fp16 / int8 inference on WikiSQL validation")
+    parser.add_argument("--model", default="models/trained_wikisql_model")
+    parser.add_argument("--precisions", nargs="+", default=["fp32", "fp16", "int8"])
+    parser.add_argument("--num-examples", type=int, default=500)
+    parser.add_argument("--max-length", type=int, default=128)
+    parser.add_argument("--fp32-beams", type=int, default=1,
+                        help="beams for the fp32 baseline; quantized variants are greedy")
+    parser.add_argument("--output", help="also write the report as JSON")
+    parser.add_argument("--store", default="logs/predictions.sqlite",
+                        help="prediction store; only prompts missing from it are decoded and timed ('' to disable)")
+    args = parser.parse_args()
+
+    results = []
+    for precision in args.precisions:
+        logger.info(f"Evaluating {precision}...")
+        # Fresh process per variant: TF/TFLite never give memory back to the OS
+        if precision != "fp32":
+            # Export (if missing) in its own process so it doesn't count towards the RSS below
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                pool.submit(export_variant, args.model, precision).result()
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results.append(pool.submit(evaluate_precision, args.model, precision, args.num_examples,
+                                       args.max_length, args.fp32_beams, args.store).result())
+
+    logger.info(f"\n{'='*50}")
+    logger.info("QUANTIZATION REPORT:")
+    for r in results:
+        lat = r["latency_ms"]
+        latency = (f"p50 {lat['p50']:.1f}ms p95 {lat['p95']:.1f}ms p99 {lat['p99']:.1f}ms" if lat
+                   else "latency n/a (fewer than 2 prompts decoded)")
+        logger.info(f"{r['precision']:>5} (beams={r['num_beams']}): EM {r['exact_match']:.2f}% | "
+                    f"similarity {r['similarity']:.2f}% | {latency} ({r['decoded']}/{r['examples']} decoded) | "
+                    f"RSS {r['rss_mb']:.0f}MB (peak {r['peak_rss_mb']:.0f}MB)")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Report saved at {args.output}")
+
+if __name__ == "__main__":
+    main()
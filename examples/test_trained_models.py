@@ -49,11 +49,10 @@ def main():
     ]
     
     logger.info("Now generating SQL queries for test prompts...")
-    for prompt in test_prompts:
+    generated_sqls = model.generate_batch(test_prompts, max_length=100)
+    for prompt, sql in zip(test_prompts, generated_sqls):
         logger.info("-"*25)
         logger.info(f"prompt given:{prompt}")
-        
-        sql = model.generate(prompt=prompt, max_length=100)
         logger.info(f"Generated SQL: {sql}")
         print()
     
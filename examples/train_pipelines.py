@@ -19,19 +19,26 @@ from src.core.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Tokenize without fixed 128-token padding and train on length-bucketed batches
+BUCKET_BY_LENGTH = True
+# e.g. 0.8 collapses near-duplicate questions with the same SQL to one example; None trains on every example
+DEDUP_THRESHOLD = None
+
 def main():
     logger.info("training pipeline...")
     
     builder = SQLDatasetBuilder()
     # builder.spider_dataset(max_examples=8000)
 
-    builder.wiqiSQL_dataset(max_examples=56355,use_schema=True)
-    dataset = builder.save_dataset(output_path="data/processed/wikisql_dataset")
+    # Built and tokenized on the first run only; later runs load it from data/processed/cache
+    dataset = builder.cached_wikisql_dataset(max_examples=56355, use_schema=True,
+                                             dynamic_padding=BUCKET_BY_LENGTH,
+                                             dedup_threshold=DEDUP_THRESHOLD)
     
-    logger.info("Dataset saved..now starting training...")
+    logger.info("Dataset ready..now starting training...")
     
     trainer = ModelTrainer(model_name_or_path="google/flan-t5-base",
-                           dataset_path="data/processed/wikisql_dataset")
+                           dataset=dataset)
     
     early = tf.keras.callbacks.EarlyStopping(monitor = 'loss',
                                              patience =5,
@@ -41,7 +48,8 @@ def main():
     history = trainer.train(epochs=20,
                             lr = 0.0001,  # Middle ground: 0.00005 too low, 0.00015 too high
                             batch_size=1,
-                            callbacks = [early]
+                            callbacks = [early],
+                            bucket_by_length=BUCKET_BY_LENGTH,
                             )
     logger.info("Training completed..now saving the model")
     trainer.save_model(output_path="models/trained_wikisql_model")
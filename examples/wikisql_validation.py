@@ -1,15 +1,25 @@
 import sys 
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from datasets import Dataset
-import glob
+import argparse
+import time
 from src.model_loader import CodeGenerationModel
+from src.adaptive_decoding import DEFAULT_CONFIDENCE_THRESHOLD
+from src.sql_canonicalizer import sql_match
+from src.prediction_store import PredictionStore
+from src.similarity import levenshtein_ratio
+from src.eval_results import EvalWriter
+from src.wikisql_prompts import wikisql_prompt, build_prompt_dataset
+from src.wikisql_loader import PROJECTED_COLUMNS, load_wikisql
 from src.core.logger import setup_logger
 from difflib import SequenceMatcher
 import re
 
 logger = setup_logger(__name__)
 
+# Prompts decoded together per model.generate call
+BATCH_SIZE = 32
+
 def similarity(str1,str2):
     return SequenceMatcher(None,str1.lower(), str2.lower()).ratio()
     
@@ -99,62 +109,110 @@ def clean_column_names_in_sql(sql, original_cols):
     return sql
     
     
-def main():
-    logger.info("Starting wikisql validation")
+def load_validation_data(data_dir=None, columns=PROJECTED_COLUMNS):
+    # Without table rows unless columns=None; data_dir falls back to $WIKISQL_DATA_DIR, then the HF cache
+    return load_wikisql("validation", data_dir, columns=columns)
+
+def build_prompt(example):
+    table = example['table']
+    return wikisql_prompt(table['name'], table['header'], table['types'], example['question'])
     
-    model = CodeGenerationModel(model_name_or_path="models/trained_wikisql_model")
     
-    logger.info("Loading model success")
-    cache_dir = "/home/aditya/.cache/huggingface/datasets/wikisql/default/0.1.0/*/wikisql-validation.arrow"
-    val_file = glob.glob(cache_dir)[0]
-    validation_data = Dataset.from_file(val_file)
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a trained model on the WikiSQL validation split")
+    parser.add_argument("--model", default="models/trained_wikisql_model")
+    parser.add_argument("--num-beams", type=int, default=5)
+    parser.add_argument("--constrained", action="store_true",
+                        help="restrict decoding to SQL keywords, schema columns and question words")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="decode greedily and escalate to --num-beams only on low confidence or failed sanity checks")
+    parser.add_argument("--confidence-threshold", type=float, default=DEFAULT_CONFIDENCE_THRESHOLD)
+    parser.add_argument("--store", default="logs/predictions.sqlite",
+                        help="prediction store; only prompts missing from it are decoded ('' to disable)")
+    parser.add_argument("--output", default="logs/wikisql_validation.jsonl",
+                        help="per-example results; summarize with python -m src.eval_results")
+    args = parser.parse_args()
+    
+    logger.info(f"Starting wikisql validation (num_beams={args.num_beams}, constrained={args.constrained}, "
+                f"adaptive={args.adaptive})")
+    
+    decode_params = {"max_length": 128, "num_beams": args.num_beams, "constrained": args.constrained,
+                     "adaptive": args.adaptive}
+    if args.adaptive:
+        decode_params["confidence_threshold"] = args.confidence_threshold
+    store = PredictionStore(args.store, args.model, decode_params) if args.store else None
+    if store is not None:
+        logger.info(f"Prediction store {args.store} already holds {store.count()} predictions for this setup")
+    
+    # Only loaded once a prompt is missing from the store
+    model = None
+    validation_data = load_validation_data()
     
     # Use all validation examples (8421 total)
     num_examples = len(validation_data)
     logger.info(f"Loaded {num_examples} validation examples - running on ALL")
+    prompts = build_prompt_dataset(validation_data)["input"]
     
     logger.info("Genearting code")
     total_similarity = 0
     exact_match = 0
+    decode_time = 0
+    decoded = 0
+    writer = EvalWriter(args.output)
     
-    for i,example in enumerate(validation_data):
-        tn = example['table']['name']
-        col = example['table']['header']
-        types = example['table']['types']
+    for start in range(0, num_examples, BATCH_SIZE):
+        batch = validation_data.select(range(start, min(start + BATCH_SIZE, num_examples)))
         
-        col_defs = []
-        for c,t in zip(col,types):
-            clean_col = c.replace(' ','_').replace('/','_')
-            sql_type = 'REAL' if t=='real' else 'TEXT'
-            col_defs.append(f"{clean_col} {sql_type}")
-        create_sql_stat = f"CREATE TABLE {tn} {(', '.join(col_defs))}"
-        input_text = f"{create_sql_stat});Question: {example['question']}"
+        input_texts = prompts[start:start + len(batch)]
         
-        pred_sql = model.generate(prompt=input_text,max_length=128)
-        expected_sql = example['sql']['human_readable']
+        pred_sqls = store.get_many(input_texts) if store is not None else [None] * len(input_texts)
+        latencies = [None] * len(input_texts)
+        missing = [j for j, pred_sql in enumerate(pred_sqls) if pred_sql is None]
+        if missing:
+            if model is None:
+                model = CodeGenerationModel(model_name_or_path=args.model)
+                logger.info("Loading model success")
+            missing_texts = [input_texts[j] for j in missing]
+            decode_start = time.time()
+            if args.adaptive:
+                generated = model.generate_adaptive(missing_texts, max_length=128,
+                                                    threshold=args.confidence_threshold, num_beams=args.num_beams)
+            else:
+                generated = model.generate_batch(missing_texts, max_length=128,
+                                                 num_beams=args.num_beams, constrained=args.constrained)
+            batch_time = time.time() - decode_start
+            decode_time += batch_time
+            decoded += len(missing)
+            for j, pred_sql in zip(missing, generated):
+                pred_sqls[j] = pred_sql
+                # Per-example share of the batched decode
+                latencies[j] = batch_time / len(missing) * 1000
+            if store is not None:
+                store.put_many(missing_texts, generated)
         
         # Compare with original column names (model predicts original)
-        similarity_score = similarity(pred_sql, expected_sql)
-        total_similarity += similarity_score
-        
-        # OPTION 1: Compare original with original (currently active)
-        if normalization(pred_sql) == normalization(expected_sql):
-            exact_match += 1
+        similarity_scores = levenshtein_ratio(pred_sqls, [example['sql']['human_readable'] for example in batch])
         
-        # OPTION 2: Clean expected SQL to match cleaned predictions (commented for future use)
-        # expected_sql_cleaned = clean_column_names_in_sql(expected_sql, col)
-        # similarity_score = similarity(pred_sql, expected_sql_cleaned)
-        # if normalization(pred_sql) == normalization(expected_sql_cleaned):
-        #     exact_match += 1
-        
-        logger.info(f"\n{'=='*25}")
-        logger.info(f"example{i+1}")
-        logger.info(f"Question: {example['question']}")
-        logger.info(f"Expected: {expected_sql}")
-        # logger.info(f"Expected (cleaned): {expected_sql_cleaned}")  # Uncomment if using OPTION 2
-        logger.info(f"Predicted: {pred_sql}")
-        logger.info(f"Similarity: {similarity_score*100:.2f}%")
+        for example, pred_sql, similarity_score, latency in zip(batch, pred_sqls, similarity_scores, latencies):
+            expected_sql = example['sql']['human_readable']
+            total_similarity += similarity_score
+            
+            # OPTION 1: Compare original with original (currently active)
+            match = sql_match(pred_sql, expected_sql)
+            exact_match += match
+            
+            # OPTION 2: Clean expected SQL to match cleaned predictions (commented for future use)
+            # expected_sql = clean_column_names_in_sql(expected_sql, example['table']['header'])
+            # similarity_score = float(levenshtein_ratio([pred_sql], [expected_sql])[0])
+            # match = sql_match(pred_sql, expected_sql)
+            
+            writer.write({"question": example['question'], "expected": expected_sql, "predicted": pred_sql,
+                          "similarity": float(similarity_score), "match": match, "latency_ms": latency})
         
+        if (start // BATCH_SIZE) % 10 == 0:
+            logger.info(f"Evaluated {start + len(batch)}/{num_examples} examples")
+    
+    writer.close()
     avg_similarity = (total_similarity/num_examples)*100
     avg_exact_match = (exact_match/num_examples)*100
     logger.info(f"\n{'='*50}")
@@ -162,6 +220,17 @@ def main():
     logger.info(f"Average Similarity: {avg_similarity:.2f}%")
     logger.info(f"Exact Match: {avg_exact_match:.2f}%")
     logger.info(f"Total Examples: {num_examples}")
+    logger.info(f"Decoded: {decoded} examples ({num_examples - decoded} from the prediction store)")
+    if decoded:
+        logger.info(f"Decode Time: {decode_time:.1f}s ({decode_time/decoded*1000:.1f}ms per example)")
+    logger.info(f"Per-example results saved at {args.output}")
+    if args.adaptive and model is not None:
+        stats = model.adaptive_stats
+        logger.info(f"Escalation Rate: {stats['escalated']/stats['requests']*100:.2f}% "
+                    f"(low confidence {stats['low_confidence']}, failed sanity {stats['failed_sanity']})")
+        logger.info(f"Greedy Tier: {stats['greedy_time']/stats['greedy_batches']*1000:.1f}ms per batch")
+        if stats['beam_batches']:
+            logger.info(f"Beam Tier: {stats['beam_time']/stats['beam_batches']*1000:.1f}ms per batch")
             
 
 if __name__=="__main__":
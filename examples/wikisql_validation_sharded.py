@@ -0,0 +1,206 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.sql_canonicalizer import sql_match
+from src.similarity import levenshtein_ratio
+from src.prediction_store import PredictionStore
+from src.core.fingerprint import fingerprint_directory
+from src.core.logger import setup_logger
+from examples.wikisql_validation import BATCH_SIZE, load_validation_data, build_prompt
+
+logger = setup_logger(__name__)
+
+# One model per worker process, loaded on the first prompt missing from the store
+worker_model = None
+worker_model_path = None
+# Per-worker connection to the shared prediction store (None when disabled)
+worker_store = None
+
+# Every worker holds a full model copy, so the default stays small even on many-core machines
+MAX_DEFAULT_WORKERS = 4
+# Memory one worker needs beyond the weights themselves (TF runtime, activations, beams)
+WORKER_OVERHEAD_BYTES = 1 << 30
+
+def available_memory_bytes():
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def default_workers(model_path):
+    """min(MAX_DEFAULT_WORKERS, cores), lowered so every worker's model copy fits in available memory"""
+    workers = min(MAX_DEFAULT_WORKERS, os.cpu_count() or 1)
+    available = available_memory_bytes()
+    if available is not None and os.path.isdir(model_path):
+        weights = sum(os.path.getsize(os.path.join(model_path, name)) for name in os.listdir(model_path)
+                      if os.path.isfile(os.path.join(model_path, name)))
+        workers = min(workers, available // (weights + WORKER_OVERHEAD_BYTES))
+    return max(1, workers)
+
+def decode_params(num_beams):
+    # Same key as wikisql_validation.py, so both runners reuse each other's predictions
+    return {"max_length": 128, "num_beams": num_beams, "constrained": False, "adaptive": False}
+
+def init_worker(model_path, threads_per_worker, store_path, num_beams):
+    global worker_model_path, worker_store
+    import tensorflow as tf
+    # Split the cores between workers instead of letting every TF runtime grab all of them
+    tf.config.threading.set_intra_op_parallelism_threads(threads_per_worker)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    worker_model_path = model_path
+    if store_path:
+        worker_store = PredictionStore(store_path, model_path, decode_params(num_beams))
+
+def get_worker_model():
+    global worker_model
+    if worker_model is None:
+        from src.model_loader import CodeGenerationModel
+        worker_model = CodeGenerationModel(model_name_or_path=worker_model_path)
+    return worker_model
+
+def shard_path(output_dir, index, num_shards):
+    return os.path.join(output_dir, f"shard-{index:05d}-of-{num_shards:05d}.json")
+
+def evaluate_shard(index, num_shards, num_examples, num_beams, output_dir):
+    """Score one contiguous shard and checkpoint its totals; runs in a worker process.
+
+    Only prompts missing from the prediction store are decoded, and their
+    predictions are written back for later runs.
+    """
+    validation_data = load_validation_data()
+    if num_examples:
+        validation_data = validation_data.select(range(min(num_examples, len(validation_data))))
+    shard = validation_data.shard(num_shards=num_shards, index=index, contiguous=True)
+
+    start_time = time.time()
+    exact_match = 0
+    total_similarity = 0
+    decoded = 0
+    for start in range(0, len(shard), BATCH_SIZE):
+        batch = shard.select(range(start, min(start + BATCH_SIZE, len(shard))))
+        prompts = [build_prompt(example) for example in batch]
+        pred_sqls = worker_store.get_many(prompts) if worker_store is not None else [None] * len(prompts)
+        missing = [j for j, pred_sql in enumerate(pred_sqls) if pred_sql is None]
+        if missing:
+            missing_prompts = [prompts[j] for j in missing]
+            generated = get_worker_model().generate_batch(missing_prompts, max_length=128, num_beams=num_beams)
+            for j, pred_sql in zip(missing, generated):
+                pred_sqls[j] = pred_sql
+            if worker_store is not None:
+                worker_store.put_many(missing_prompts, generated)
+            decoded += len(missing)
+        expected_sqls = [example['sql']['human_readable'] for example in batch]
+        total_similarity += float(levenshtein_ratio(pred_sqls, expected_sqls).sum())
+        exact_match += sum(sql_match(pred_sql, expected_sql) for pred_sql, expected_sql in zip(pred_sqls, expected_sqls))
+
+    result = {
+        "shard": index,
+        "examples": len(shard),
+        "decoded": decoded,
+        "exact_match": exact_match,
+        "similarity": total_similarity,
+        "seconds": time.time() - start_time,
+    }
+    # Write then rename so a crash never leaves a half-written checkpoint behind
+    path = shard_path(output_dir, index, num_shards)
+    with open(path + ".tmp", "w") as f:
+        json.dump(result, f)
+    os.replace(path + ".tmp", path)
+    return result
+
+def load_checkpoints(output_dir, run_config):
+    """Finished shard results from an earlier run with the same settings"""
+    config_path = os.path.join(output_dir, "run.json")
+    if os.path.exists(config_path):
+        with open(config_path) as f:
+            previous = json.load(f)
+        if previous != run_config:
+            raise ValueError(f"{output_dir} holds a run with different settings ({previous}); "
+                             f"use another --output-dir or delete it")
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+        with open(config_path, "w") as f:
+            json.dump(run_config, f, indent=2)
+
+    finished = {}
+    for index in range(run_config["num_shards"]):
+        path = shard_path(output_dir, index, run_config["num_shards"])
+        if os.path.exists(path):
+            with open(path) as f:
+                finished[index] = json.load(f)
+    return finished
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded, resumable WikiSQL validation across worker processes")
+    parser.add_argument("--model", default="models/trained_wikisql_model")
+    parser.add_argument("--num-beams", type=int, default=5)
+    parser.add_argument("--workers", type=int,
+                        help="worker processes, each holding its own copy of the model; defaults to "
+                             f"at most {MAX_DEFAULT_WORKERS}, fewer if available memory can't hold that many copies")
+    parser.add_argument("--num-shards", type=int,
+                        help="defaults to 4 per worker so finished work is checkpointed often")
+    parser.add_argument("--num-examples", type=int, help="only evaluate the first N validation examples")
+    parser.add_argument("--output-dir", default="logs/wikisql_validation_shards",
+                        help="shard checkpoints; rerunning with the same directory resumes")
+    parser.add_argument("--store", default="logs/predictions.sqlite",
+                        help="prediction store shared by the workers; only prompts missing from it are decoded "
+                             "('' to disable)")
+    args = parser.parse_args()
+
+    args.workers = args.workers or default_workers(args.model)
+    num_shards = args.num_shards or args.workers * 4
+    # The fingerprint changes when the checkpoint is retrained in place, so stale shards are never resumed
+    run_config = {"model": os.path.abspath(args.model), "model_fingerprint": fingerprint_directory(args.model),
+                  "num_beams": args.num_beams,
+                  "num_shards": num_shards, "num_examples": args.num_examples}
+    results = load_checkpoints(args.output_dir, run_config)
+    if args.store:
+        store = PredictionStore(args.store, args.model, decode_params(args.num_beams))
+        logger.info(f"Prediction store {args.store} already holds {store.count()} predictions for this setup")
+        store.close()
+    pending = [index for index in range(num_shards) if index not in results]
+    logger.info(f"{len(results)}/{num_shards} shards already finished, {len(pending)} to go "
+                f"on {args.workers} workers")
+
+    start_time = time.time()
+    if pending:
+        threads_per_worker = max(1, os.cpu_count() // args.workers)
+        # spawn: TF does not survive being forked after it has initialised
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=init_worker,
+                                 initargs=(args.model, threads_per_worker, args.store, args.num_beams)) as pool:
+            futures = [pool.submit(evaluate_shard, index, num_shards, args.num_examples,
+                                   args.num_beams, args.output_dir) for index in pending]
+            for future in as_completed(futures):
+                result = future.result()
+                results[result["shard"]] = result
+                logger.info(f"Shard {result['shard']} done: {result['examples']} examples in "
+                            f"{result['seconds']:.1f}s ({len(results)}/{num_shards})")
+    wall_time = time.time() - start_time
+
+    num_examples = sum(r["examples"] for r in results.values())
+    exact_match = sum(r["exact_match"] for r in results.values())
+    total_similarity = sum(r["similarity"] for r in results.values())
+    worker_time = sum(r["seconds"] for r in results.values())
+    # Checkpoints written before the store existed decoded every example
+    decoded = sum(r.get("decoded", r["examples"]) for r in results.values())
+    logger.info(f"\n{'='*50}")
+    logger.info("FINAL RESULTS:")
+    logger.info(f"Average Similarity: {total_similarity/num_examples*100:.2f}%")
+    logger.info(f"Exact Match: {exact_match/num_examples*100:.2f}%")
+    logger.info(f"Total Examples: {num_examples}")
+    logger.info(f"Decoded: {decoded} examples ({num_examples - decoded} from the prediction store)")
+    logger.info(f"Wall Time: {wall_time:.1f}s this run ({worker_time:.1f}s of worker time across all shards)")
+
+if __name__ == "__main__":
+    main()
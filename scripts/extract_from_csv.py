@@ -1,18 +1,33 @@
 import pandas as pd
+import argparse
+import hashlib
 import json
+import os
 import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from src.core.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Compiled once per process instead of on every call
+WHITESPACE_PATTERN = re.compile(r'\s+')
+PARAM_PATTERN = re.compile(r'\bp\d+\b')
+COLLECTION_PATTERN = re.compile(r'collection\d+_')
+TABLE_PATTERN = re.compile(r'from\s+([\w.]+)')
+
+# Query log rows read (and handed to a worker) at a time
+CHUNK_SIZE = 200_000
+
 def simplify_query(query):
     """Clean and simplify SQL query"""
     # Remove extra spaces and newlines
-    query = re.sub(r'\s+', ' ', query.strip())
+    query = WHITESPACE_PATTERN.sub(' ', query.strip())
     # Remove parameters like p1, p2, etc
-    query = re.sub(r'\bp\d+\b', '?', query)
+    query = PARAM_PATTERN.sub('?', query)
     # Remove collection references
-    query = re.sub(r'collection\d+_', '?', query)
+    query = COLLECTION_PATTERN.sub('?', query)
     return query
 
 def generate_natural_language(query):
@@ -21,70 +36,121 @@ def generate_natural_language(query):
     
     # Basic patterns
     if 'select max' in query_lower and 'from' in query_lower:
-        table = re.search(r'from\s+([\w.]+)', query_lower)
+        table = TABLE_PATTERN.search(query_lower)
         if table:
             return f"Get maximum value from {table.group(1)}"
     
     if 'select a from' in query_lower and 'left join' in query_lower:
-        table = re.search(r'from\s+([\w.]+)', query_lower)
+        table = TABLE_PATTERN.search(query_lower)
         if table:
             return f"Get records from {table.group(1)} with left join"
     
     if 'select' in query_lower and 'where' in query_lower:
-        table = re.search(r'from\s+([\w.]+)', query_lower)
+        table = TABLE_PATTERN.search(query_lower)
         if table:
             return f"Find records from {table.group(1)} with conditions"
     
     if 'select' in query_lower and 'from' in query_lower:
-        table = re.search(r'from\s+([\w.]+)', query_lower)
+        table = TABLE_PATTERN.search(query_lower)
         if table:
             return f"Get all from {table.group(1)}"
     
     return "Execute SQL query"
 
-def main():
-    logger.info("Reading CSV file...")
-    
-    # Read CSV
-    csv_path = "/home/aditya/mlproj/llm_training_ex/data/processed/finalcsv_cutted.csv"
-    df = pd.read_csv(csv_path)
-    
-    logger.info(f"Total rows in CSV: {len(df)}")
-    logger.info(f"Columns: {list(df.columns)}")
-    
-    # Extract unique queries (sample first 1000 for now)
-    queries = df['query'].head(1000).unique()
-    logger.info(f"Unique queries in first 1000 rows: {len(queries)}")
-    
-    # Create training examples
-    examples = []
-    for query in queries[:100]:  # Take first 100 unique queries
-        if pd.isna(query) or len(str(query).strip()) == 0:
+def query_hash(query):
+    # 8-byte digests keep the global seen-set small even for tens of millions of distinct queries
+    return hashlib.blake2b(query.encode(), digest_size=8).digest()
+
+def mine_chunk(queries):
+    """(hash, input, output) for each distinct non-empty query of one chunk"""
+    mined = {}
+    for query in queries:
+        if not isinstance(query, str) or not query.strip():
             continue
-            
-        clean_query = simplify_query(str(query))
-        nl_description = generate_natural_language(clean_query)
-        
-        examples.append({
-            "input": nl_description,
-            "output": clean_query
-        })
-    
-    logger.info(f"Created {len(examples)} examples")
-    
-    # Save to JSON
-    output_path = "/home/aditya/mlproj/llm_training_ex/data/processed/csv_extracted_dataset.json"
-    with open(output_path, 'w') as f:
-        json.dump(examples, f, indent=2)
-    
-    logger.info(f"Saved examples to {output_path}")
+        clean_query = simplify_query(query)
+        key = query_hash(clean_query)
+        if key not in mined:
+            mined[key] = (key, generate_natural_language(clean_query), clean_query)
+    return list(mined.values())
+
+def iter_query_chunks(csv_path, column="query", chunksize=CHUNK_SIZE):
+    reader = pd.read_csv(csv_path, usecols=[column], dtype=str, engine="c", chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            yield chunk[column].tolist()
+
+def mine_queries(csv_path, output_path, column="query", chunksize=CHUNK_SIZE, workers=None, max_examples=None):
+    """Mine (description, query) examples from a whole query log into a JSONL file.
+
+    Chunks are cleaned in a process pool (at most two per worker in flight, so
+    memory stays bounded) and results are deduplicated globally by the hash of
+    the cleaned query, in file order. Returns the number of examples written.
+    """
+    workers = workers or os.cpu_count()
+    seen = set()
+    stats = {"rows": 0, "written": 0}
+    start_time = time.perf_counter()
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    def write_oldest(pending, f):
+        chunk_rows, future = pending.popleft()
+        lines = []
+        for key, nl_description, clean_query in future.result():
+            if key in seen or (max_examples is not None and stats["written"] + len(lines) >= max_examples):
+                continue
+            seen.add(key)
+            lines.append(json.dumps({"input": nl_description, "output": clean_query}))
+        if lines:
+            f.write("\n".join(lines) + "\n")
+        stats["rows"] += chunk_rows
+        stats["written"] += len(lines)
+        logger.info(f"{stats['rows']} rows | {stats['written']} unique examples | "
+                    f"{stats['rows'] / (time.perf_counter() - start_time):,.0f} rows/sec")
+
+    def done():
+        return max_examples is not None and stats["written"] >= max_examples
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(output_path, 'w', encoding="utf-8") as f:
+        pending = deque()
+        for queries in iter_query_chunks(csv_path, column=column, chunksize=chunksize):
+            pending.append((len(queries), pool.submit(mine_chunk, queries)))
+            if len(pending) >= 2 * workers:
+                write_oldest(pending, f)
+            if done():
+                break
+        while pending and not done():
+            write_oldest(pending, f)
+        for _, future in pending:
+            future.cancel()
+    rows, written = stats["rows"], stats["written"]
+    elapsed = time.perf_counter() - start_time
+    logger.info(f"Mined {written} unique examples from {rows} rows in {elapsed:.1f}s "
+                f"({rows / max(elapsed, 1e-9):,.0f} rows/sec, {workers} workers)")
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Mine (description, SQL) training examples from a query log CSV")
+    parser.add_argument("--csv", default="/home/aditya/mlproj/llm_training_ex/data/processed/finalcsv_cutted.csv")
+    parser.add_argument("--output", default="/home/aditya/mlproj/llm_training_ex/data/processed/csv_extracted_dataset.jsonl")
+    parser.add_argument("--column", default="query")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="processes; defaults to the CPU count")
+    parser.add_argument("--max-examples", type=int, default=None, help="stop after this many unique examples")
+    args = parser.parse_args()
+
+    logger.info(f"Reading query log {args.csv}...")
+    mine_queries(args.csv, args.output, column=args.column, chunksize=args.chunksize,
+                 workers=args.workers, max_examples=args.max_examples)
+    logger.info(f"Saved examples to {args.output}")
     
     # Show sample
     logger.info("Sample examples:")
-    for ex in examples[:5]:
-        logger.info(f"Input: {ex['input']}")
-        logger.info(f"Output: {ex['output']}")
-        logger.info("---")
+    with open(args.output, encoding="utf-8") as f:
+        for _, line in zip(range(5), f):
+            ex = json.loads(line)
+            logger.info(f"Input: {ex['input']}")
+            logger.info(f"Output: {ex['output']}")
+            logger.info("---")
 
 if __name__ == "__main__":
     main()
@@ -1,41 +1,71 @@
 import pandas as pd
 # df= pd.read_csv("/home/aditya/mlproj/llm_training_ex/data/sql/spider_text_sql.csv")
 import json
+import os
 from src.core.logger import setup_logger
 logger = setup_logger(__name__)
- 
- 
+
+# CSV rows parsed per chunk; memory stays bounded by this, not by the corpus size
+CHUNK_SIZE = 100_000
+SPIDER_COLUMNS = {"text_query": "input", "sql_command": "output"}
+
+def iter_spider_chunks(csv_path, num_examples=None, chunksize=CHUNK_SIZE):
+    """Yield DataFrames of input/output examples from the Spider CSV, chunksize rows at a time.
+
+    Only the two needed columns are parsed (C engine, string dtype) and rows
+    with a missing question or query are dropped; num_examples caps the total.
+    """
+    remaining = num_examples
+    reader = pd.read_csv(csv_path, usecols=list(SPIDER_COLUMNS), dtype=str, engine="c", chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            chunk = chunk.rename(columns=SPIDER_COLUMNS)[["input", "output"]].dropna()
+            if remaining is not None:
+                chunk = chunk.head(remaining)
+                remaining -= len(chunk)
+            if len(chunk):
+                yield chunk
+            if remaining == 0:
+                break
+
 def load_data_spider(csv_path,num_examples= 8000):
-     logger.info("LOADING DATA FROM SPIDER CSV")
-     df = pd.read_csv(csv_path)
-     logger.info(f"Total row:{len(df)}")
-     logger.info(f"columns:{len(list(df.columns))}")
-     logger.info(f"Columns are:{list(df.columns)}")
-     
-     df_ex = df.head(num_examples)
-     examples = []
-     for _,row in df_ex.iterrows():
-         examples.append({
-             "input":row["text_query"],"output":row["sql_command"]
-         })
-     logger.info(f"example save success")
-     return examples
- 
+    logger.info("LOADING DATA FROM SPIDER CSV")
+    examples = []
+    for chunk in iter_spider_chunks(csv_path, num_examples=num_examples):
+        examples.extend(chunk.to_dict("records"))
+    logger.info(f"example save success: {len(examples)} examples")
+    return examples
+
 def save_examples(examples,output_path):
-    with open(output_path,'w') as f:
-        json.dump(examples, f, indent = 2)
-    logger.info(f"examples saved at {output_path}")
-    
+    """Write examples (a list of dicts or an iterable of DataFrame chunks) as JSON Lines"""
+    count = 0
+    with open(output_path,'w', encoding="utf-8") as f:
+        if isinstance(examples, list):
+            examples = [pd.DataFrame(examples, columns=["input", "output"])]
+        for chunk in examples:
+            if len(chunk):
+                f.write(chunk.to_json(orient="records", lines=True, force_ascii=False).rstrip("\n") + "\n")
+                count += len(chunk)
+    logger.info(f"{count} examples saved at {output_path}")
+    return count
+
+def extract_spider(csv_path, output_path, num_examples=None, chunksize=CHUNK_SIZE):
+    """Stream the Spider CSV into a JSONL file without holding the corpus in memory"""
+    logger.info(f"Extracting {csv_path} -> {output_path} in chunks of {chunksize} rows")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    return save_examples(iter_spider_chunks(csv_path, num_examples=num_examples, chunksize=chunksize), output_path)
+
 def display_spider_dataset(examples,num_samples=5):
     logger.info("Displaying samples from spider dataset")
     for i,r in enumerate(examples[:num_samples],start=1):
         logger.info(f"sample{i}")
         logger.info(f"In:{r['input']}")
         logger.info(f"In:{r['output']}")
-        
+
 if __name__=="__main__":
     csv_path ="/home/aditya/mlproj/llm_training_ex/data/sql/spider_text_sql.csv"
-    examples = load_data_spider(csv_path,num_examples=8000)
-    save_examples(examples,"/home/aditya/mlproj/llm_training_ex/data/processed/spider_extracted_dataset.json")
-    display_spider_dataset(examples,num_samples=5)
-    logger.info("Extract completed")
\ No newline at end of file
+    output_path = "/home/aditya/mlproj/llm_training_ex/data/processed/spider_extracted_dataset.jsonl"
+    extract_spider(csv_path, output_path, num_examples=8000)
+    with open(output_path) as f:
+        display_spider_dataset([json.loads(line) for _, line in zip(range(5), f)], num_samples=5)
+    logger.info("Extract completed")
@@ -0,0 +1,62 @@
+import re
+import numpy as np
+import tensorflow as tf
+from src.schema_parser import parse_prompt
+
+# Mean token log-prob below this sends a greedy result to beam search
+DEFAULT_CONFIDENCE_THRESHOLD = -0.1
+
+SELECT_PATTERN = re.compile(r'^\s*select\s+(?:(?:count|sum|avg|max|min)\s*\(\s*(.+?)\s*\)|(.+?))\s+from\s+\S+', re.IGNORECASE)
+WHERE_PATTERN = re.compile(r'\bwhere\b(.*)$', re.IGNORECASE | re.DOTALL)
+CONDITION_PATTERN = re.compile(r'^\s*(.+?)\s*(?:<=|>=|!=|<>|=|<|>)', re.DOTALL)
+AND_PATTERN = re.compile(r'\s+and\s+', re.IGNORECASE)
+# WikiSQL writes aggregates without parentheses: SELECT COUNT Player FROM table
+BARE_AGGREGATE_PATTERN = re.compile(r'^(?:count|sum|avg|max|min)\s+', re.IGNORECASE)
+
+def _column_key(name):
+    return re.sub(r'[\s/]+', '_', name.strip()).lower()
+
+def sequence_confidence(scores, sequences, eos_token_id):
+    """Mean log-prob of each greedy sequence's tokens up to and including EOS.
+
+    scores are the per-step processed logits from generate(output_scores=True),
+    sequences the returned ids including the decoder start token.
+    """
+    sequences = sequences.numpy()
+    token_logprobs = []
+    for step, step_scores in enumerate(scores):
+        log_probs = tf.nn.log_softmax(step_scores, axis=-1)
+        chosen = tf.constant(sequences[:, step + 1:step + 2])
+        token_logprobs.append(tf.gather(log_probs, chosen, batch_dims=1)[:, 0].numpy())
+    token_logprobs = np.stack(token_logprobs, axis=1)
+
+    # Steps after a sequence emitted EOS only hold padding
+    generated = sequences[:, 1:1 + token_logprobs.shape[1]]
+    finished_before = np.cumsum(generated == eos_token_id, axis=1) - (generated == eos_token_id)
+    valid = finished_before == 0
+    return (token_logprobs * valid).sum(axis=1) / np.maximum(valid.sum(axis=1), 1)
+
+def sql_sanity_issues(sql, prompt):
+    """Cheap structural checks on generated SQL; returns a list of problems (empty if fine)"""
+    issues = []
+    select = SELECT_PATTERN.match(sql)
+    if select is None:
+        issues.append("missing SELECT ... FROM")
+    parsed = parse_prompt(prompt)
+    if parsed is None or select is None:
+        return issues
+
+    columns = {_column_key(col) for col, _ in parsed[1]}
+    selected = select.group(1) or select.group(2)
+    if (selected.strip() != '*' and _column_key(selected) not in columns
+            and _column_key(BARE_AGGREGATE_PATTERN.sub('', selected)) not in columns):
+        issues.append(f"unknown column {selected!r}")
+    where = WHERE_PATTERN.search(sql)
+    if where:
+        for condition in AND_PATTERN.split(where.group(1)):
+            match = CONDITION_PATTERN.match(condition)
+            if match is None:
+                issues.append(f"malformed condition {condition.strip()!r}")
+            elif _column_key(match.group(1)) not in columns:
+                issues.append(f"unknown column {match.group(1)!r}")
+    return issues
@@ -0,0 +1,120 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from src.core.logger import setup_logger
+
+# Setup logger
+logger = setup_logger(__name__)
+
+class MicroBatcher:
+    """Collect concurrent prompts into one batched decode.
+
+    A background worker waits for the first request, then keeps collecting
+    until max_batch_size prompts are queued or max_wait_ms has passed since
+    that first request, and runs them through generate_fn in a single call.
+    Each caller gets its own output back through a Future.
+    """
+    def __init__(self, generate_fn, max_batch_size: int=8, max_wait_ms: float=10,
+                 report_every: int=50):
+        self.generate_fn = generate_fn  # list of prompts -> list of outputs, same order
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.report_every = report_every
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._max_batch = 0
+        self._max_queue_depth = 0
+        self._last_queue_depth = 0
+        self._batch_sizes = {}
+
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+        logger.info(f"Micro-batcher started (max_batch_size={max_batch_size}, max_wait_ms={max_wait_ms})")
+
+    def submit(self, prompt) -> Future:
+        future = Future()
+        self._queue.put((prompt, future))
+        return future
+
+    def generate(self, prompt, timeout=None):
+        """Blocking helper for request handlers"""
+        return self.submit(prompt).result(timeout=timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "batches": self._batches,
+                "requests": self._requests,
+                "avg_batch_size": self._requests / self._batches if self._batches else 0.0,
+                "max_batch_size": self._max_batch,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "queue_depth": self._queue.qsize(),
+                "last_queue_depth": self._last_queue_depth,
+                "max_queue_depth": self._max_queue_depth,
+            }
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Serve what we have, then let _run see the shutdown marker
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+            queue_depth = self._queue.qsize()
+            prompts = [prompt for prompt, _ in batch]
+            start_time = time.time()
+            try:
+                outputs = list(self.generate_fn(prompts))
+                if len(outputs) != len(prompts):
+                    # zip would leave the extra futures unresolved and their callers waiting forever
+                    raise RuntimeError(f"generate_fn returned {len(outputs)} outputs for {len(prompts)} prompts")
+            except Exception as e:
+                logger.error(f"Batched generation failed for {len(batch)} requests: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            elapsed = time.time() - start_time
+
+            for (_, future), output in zip(batch, outputs):
+                future.set_result(output)
+            self._record(len(batch), queue_depth, elapsed)
+
+    def _record(self, batch_size, queue_depth, elapsed):
+        with self._lock:
+            self._batches += 1
+            self._requests += batch_size
+            self._max_batch = max(self._max_batch, batch_size)
+            self._batch_sizes[batch_size] = self._batch_sizes.get(batch_size, 0) + 1
+            self._last_queue_depth = queue_depth
+            self._max_queue_depth = max(self._max_queue_depth, queue_depth)
+            report = self._batches % self.report_every == 0
+        logger.debug(f"Decoded batch of {batch_size} in {elapsed:.2f}s (queue depth {queue_depth})")
+        if report:
+            logger.info(f"Micro-batcher stats: {self.stats()}")
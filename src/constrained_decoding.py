@@ -0,0 +1,105 @@
+import numpy as np
+import tensorflow as tf
+from transformers.generation import TFLogitsProcessor
+from src.schema_parser import parse_prompt, WHITESPACE
+
+# Everything WikiSQL-style SQL is built from besides columns and copied values
+SQL_KEYWORDS = ["SELECT", "FROM", "WHERE", "AND", "OR", "table", "DISTINCT", "AS",
+                "GROUP BY", "ORDER BY", "ASC", "DESC", "LIMIT", "HAVING", "NOT", "NULL", "LIKE", "IN"]
+AGGREGATES = ["COUNT", "SUM", "AVG", "MAX", "MIN"]
+OPERATORS = ["=", ">", "<", ">=", "<=", "!=", "<>", "(", ")", ",", "*", "'", '"', "-", "."]
+
+def _word_variants(text):
+    # Values often change case between question and gold SQL ("south australia" -> "South Australia")
+    return {text, text.lower(), text.upper(), text.title()}
+
+def _token_ids(tokenizer, texts):
+    ids = set()
+    for text in texts:
+        ids.update(tokenizer(text, add_special_tokens=False)["input_ids"])
+    return ids
+
+class SchemaVocabulary:
+    """Token ids a schema prompt is allowed to generate.
+
+    The always-allowed part (SQL keywords, aggregates, operators, digits and
+    punctuation pieces, EOS) is computed once per tokenizer. Each prompt adds
+    its table and column names (underscore and space spellings) and the words
+    of the question, so values are copied rather than invented.
+    """
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        base = set()
+        for word in SQL_KEYWORDS + AGGREGATES + OPERATORS:
+            base.update(_token_ids(tokenizer, _word_variants(word)))
+        # Numbers and punctuation pieces show up in values the question spells differently
+        for piece, token_id in tokenizer.get_vocab().items():
+            if piece.lstrip('▁') and not any(ch.isalpha() for ch in piece):
+                base.add(token_id)
+        base.update({tokenizer.eos_token_id, tokenizer.pad_token_id})
+        self.base_ids = base
+
+    def allowed_ids(self, prompt):
+        parsed = parse_prompt(prompt)
+        if parsed is None:
+            texts = [prompt]
+        else:
+            table, columns, question = parsed
+            texts = [table, question]
+            for col, _ in columns:
+                texts.extend([col, col.replace('_', ' ')])
+        words = set()
+        for text in texts:
+            words.update(_word_variants(text))
+            for word in WHITESPACE.split(text):
+                words.update(_word_variants(word))
+        return self.base_ids | _token_ids(self.tokenizer, words)
+
+    def mask(self, prompts, vocab_size):
+        """Boolean (len(prompts), vocab_size) tensor, True where a token may be generated"""
+        mask = np.zeros((len(prompts), vocab_size), dtype=bool)
+        for row, prompt in enumerate(prompts):
+            mask[row, [i for i in self.allowed_ids(prompt) if i < vocab_size]] = True
+        return tf.constant(mask)
+
+class TFSchemaConstrainedLogitsProcessor(TFLogitsProcessor):
+    """Sets the score of every token outside a prompt's SchemaVocabulary to -inf"""
+    def __init__(self, allowed_mask):
+        self.allowed_mask = allowed_mask  # (batch_size, vocab_size)
+
+    def __call__(self, input_ids, scores, cur_len):
+        # Beam search flattens (batch, beams) into the first dimension, beams varying fastest
+        num_beams = scores.shape[0] // self.allowed_mask.shape[0]
+        mask = tf.repeat(self.allowed_mask, num_beams, axis=0)
+        return tf.where(mask, scores, tf.fill(tf.shape(scores), float("-inf")))
+
+class TFNoRepeatNGramXLALogitsProcessor(TFLogitsProcessor):
+    """no_repeat_ngram_size for XLA-compiled generate, in pure tf ops.
+
+    Bans the same tokens as transformers' TFNoRepeatNGramLogitsProcessor (which
+    only runs eagerly): every token that would complete an ngram_size-gram
+    already present in the first cur_len positions of input_ids. input_ids may
+    be generate's fixed-size buffer; positions from cur_len on are ignored.
+    """
+    def __init__(self, ngram_size):
+        if not isinstance(ngram_size, int) or ngram_size <= 0:
+            raise ValueError(f"ngram_size has to be a strictly positive integer, got {ngram_size}")
+        self.ngram_size = ngram_size
+
+    def __call__(self, input_ids, scores, cur_len):
+        n = self.ngram_size
+        starts = input_ids.shape[1] - n + 1
+        if starts <= 0:
+            return scores
+        # ngram i (positions i .. i+n-1) is complete before cur_len and begins with the current n-1 token suffix
+        matches = tf.range(starts) <= cur_len - n
+        matches = tf.broadcast_to(matches[None, :], [tf.shape(input_ids)[0], starts])
+        for k in range(n - 1):
+            suffix_token = tf.gather(input_ids, tf.maximum(cur_len - n + 1 + k, 0), axis=1)
+            matches &= input_ids[:, k:k + starts] == suffix_token[:, None]
+        banned = tf.cast(input_ids[:, n - 1:], tf.int32)
+        rows = tf.broadcast_to(tf.range(tf.shape(banned)[0])[:, None], tf.shape(banned))
+        banned_mask = tf.tensor_scatter_nd_max(tf.zeros(tf.shape(scores), dtype=tf.int32),
+                                               tf.reshape(tf.stack([rows, banned], axis=-1), [-1, 2]),
+                                               tf.reshape(tf.cast(matches, tf.int32), [-1]))
+        return tf.where(banned_mask > 0, tf.fill(tf.shape(scores), float("-inf")), scores)
@@ -0,0 +1,62 @@
+import hashlib
+import os
+import threading
+import time
+
+def fingerprint_directory(path):
+    """Cheap fingerprint of a model/data directory from file names, sizes and mtimes.
+
+    Anything that is not a local directory (e.g. a hub id like google/flan-t5-base)
+    is fingerprinted by its name.
+    """
+    digest = hashlib.sha1()
+    if not os.path.isdir(path):
+        digest.update(str(path).encode())
+        return digest.hexdigest()
+    for name in sorted(os.listdir(path)):
+        file_path = os.path.join(path, name)
+        if not os.path.isfile(file_path):
+            continue
+        stat = os.stat(file_path)
+        digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()
+
+class CheckpointWatcher:
+    """Notices when a named checkpoint directory changes on disk (e.g. retrained in place).
+
+    check() re-fingerprints the directories at most every check_interval
+    seconds and calls every subscriber with the name of each checkpoint that
+    changed, so all state derived from it (loaded weights, cached responses)
+    is invalidated by the same hook.
+    """
+    def __init__(self, model_dirs, check_interval: float=5):
+        self.model_dirs = dict(model_dirs)  # name -> checkpoint directory
+        self.check_interval = check_interval
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._fingerprints = {name: fingerprint_directory(path) for name, path in self.model_dirs.items()}
+        self._last_check = time.monotonic()
+        self.changes = 0
+
+    def subscribe(self, callback):
+        """callback(name) runs (in the checking thread) whenever checkpoint name changes"""
+        self._subscribers.append(callback)
+
+    def check(self):
+        """Names of the checkpoints found changed by this call; subscribers have been notified on return"""
+        with self._lock:
+            if time.monotonic() - self._last_check < self.check_interval:
+                return []
+            self._last_check = time.monotonic()
+            changed = []
+            for name, path in self.model_dirs.items():
+                fingerprint = fingerprint_directory(path)
+                if fingerprint != self._fingerprints[name]:
+                    self._fingerprints[name] = fingerprint
+                    changed.append(name)
+            self.changes += len(changed)
+        # Outside the lock: subscribers take their own locks
+        for name in changed:
+            for callback in self._subscribers:
+                callback(name)
+        return changed
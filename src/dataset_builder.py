@@ -1,11 +1,43 @@
-from datasets import Dataset
+from datasets import Dataset, load_from_disk
 from transformers import AutoTokenizer
+import transformers
+import hashlib
 import json
+import os
+import shutil
+from src.wikisql_prompts import build_prompt_dataset
+from src.near_dedup import dedupe_indices
+from src.wikisql_loader import load_wikisql, wikisql_file
+from src.core.fingerprint import fingerprint_directory
 from src.core.logger import setup_logger
 
 # Setup logger
 logger = setup_logger(__name__)
 
+# Tokenized datasets keyed by everything that affects their contents
+DATASET_CACHE_DIR = "data/processed/cache"
+# Fewer examples than this per process and starting the workers costs more than it saves
+MIN_EXAMPLES_PER_PROC = 5000
+
+def default_num_proc(num_examples):
+    """Processes for a Dataset.map over num_examples rows: one per core, but at least MIN_EXAMPLES_PER_PROC rows each"""
+    return max(1, min(os.cpu_count() or 1, num_examples // MIN_EXAMPLES_PER_PROC))
+
+def _tokenize_batch(inputs, outputs, tokenizer, max_length, dynamic_padding):
+    if dynamic_padding:
+        # Nothing to mask yet; padding added per batch is labelled -100 by the trainer
+        model_inputs = tokenizer(inputs, max_length=max_length, truncation=True)
+        model_inputs["labels"] = tokenizer(outputs, max_length=max_length, truncation=True)["input_ids"]
+        return model_inputs
+    model_inputs = tokenizer(inputs, max_length=max_length, truncation=True, padding="max_length",
+                             return_tensors="np")
+    labels = tokenizer(outputs, max_length=max_length, truncation=True, padding="max_length",
+                       return_tensors="np")["input_ids"]
+    # Padded label positions are ignored by the loss
+    labels[labels == tokenizer.pad_token_id] = -100
+    return {"input_ids": model_inputs["input_ids"], "attention_mask": model_inputs["attention_mask"],
+            "labels": labels}
+
 class SQLDatasetBuilder:
     def __init__(self, tokenizer_name ="google/flan-t5-base"):
         self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
@@ -202,84 +234,141 @@ class SQLDatasetBuilder:
         logger.info(f"Created {len(self.examples)} training examples")
         return self.examples
 
-    def prepare_dataset(self):
-        model_inputs = self.tokenizer(
-            [ex["input"] for ex in self.examples], # inputs
-            max_length=128,
-            truncation=True,
-            padding="max_length",
-        )
-        # retunr a dictionary with (input_ids, attention_mask)
-        labels = self.tokenizer(
-            [ex["output"] for ex in self.examples], # outputs
-            max_length=128,
-            truncation=True,
-            padding="max_length",
+    def prepare_dataset(self, dynamic_padding=False, num_proc=None, batch_size=1000, max_length=128):
+        """Tokenize examples into input_ids / attention_mask / labels.
+
+        Runs as a batched Dataset.map, so examples are tokenized chunk by chunk
+        (across num_proc processes, default_num_proc() if None) and, for
+        file-backed datasets like WikiSQL, written straight to a memory-mapped
+        Arrow cache file instead of being held as Python lists.
+
+        With dynamic_padding the sequences keep their own length and are padded
+        per batch at training time (ModelTrainer.train(bucket_by_length=True));
+        otherwise everything is padded to max_length tokens.
+        """
+        # WikiSQL examples are already a Dataset of input/output columns, the others a list of dicts
+        examples = self.examples
+        if not isinstance(examples, Dataset):
+            examples = Dataset.from_dict({"input": [ex["input"] for ex in examples],
+                                          "output": [ex["output"] for ex in examples]})
+        num_proc = num_proc or default_num_proc(len(examples))
+        dataset = examples.map(
+            _tokenize_batch,
+            batched=True,
+            batch_size=batch_size,
+            input_columns=["input", "output"],
+            fn_kwargs={"tokenizer": self.tokenizer, "max_length": max_length, "dynamic_padding": dynamic_padding},
+            remove_columns=examples.column_names,
+            num_proc=num_proc,
+            desc="Tokenizing",
         )
-        tf_list = []
-        for label_id in labels["input_ids"]:
-            tf_list.append([-100 if id == self.tokenizer.pad_token_id else id for id in label_id])
-        
-        dataset=Dataset.from_dict({
-            "input_ids": model_inputs["input_ids"],
-            "attention_mask": model_inputs["attention_mask"],
-            "labels": tf_list,
-        })
         
         logger.info(f"Dataset prepared with {len(dataset)} examples")
         return dataset
         
-    def save_dataset(self, output_path="data/processed/sql_dataset"):
-        dataset = self.prepare_dataset()
+    def deduplicate(self, threshold=0.8, keep_per_cluster=1):
+        """Drop exact and near-duplicate examples from self.examples; returns the shrink report.
+
+        Two examples are duplicates when their SQL is the same and their questions
+        are near-identical (MinHash/LSH, see src.near_dedup) over the same WikiSQL
+        schema; the schema must match exactly and only the questions are compared
+        by MinHash. keep_per_cluster > 1 keeps a
+        few of each cluster, downweighting it rather than dropping it entirely.
+        """
+        if isinstance(self.examples, Dataset):
+            inputs, outputs = self.examples["input"], self.examples["output"]
+        else:
+            inputs, outputs = [ex["input"] for ex in self.examples], [ex["output"] for ex in self.examples]
+        # "CREATE TABLE ...;Question: ..." -> schema, question ("" schema for prompts without one)
+        schemas, questions = zip(*(text.rpartition("Question: ")[::2] for text in inputs)) if inputs else ((), ())
+        kept, report = dedupe_indices(list(questions), outputs, threshold=threshold,
+                                      keep_per_cluster=keep_per_cluster, contexts=list(schemas))
+        if isinstance(self.examples, Dataset):
+            self.examples = self.examples.select(kept)
+        else:
+            self.examples = [self.examples[i] for i in kept]
+        return report
+
+    def save_dataset(self, output_path="data/processed/sql_dataset", dynamic_padding=False, num_proc=None):
+        dataset = self.prepare_dataset(dynamic_padding=dynamic_padding, num_proc=num_proc)
         dataset.save_to_disk(output_path)
         json_path = output_path + ".json"
-        with open(json_path,'w') as f:
-            json.dump(self.examples,f,indent =2)
+        if isinstance(self.examples, Dataset):
+            self.examples.to_json(json_path, orient="records", lines=False, indent=2)
+        else:
+            with open(json_path,'w') as f:
+                json.dump(self.examples,f,indent =2)
         return dataset
     
-    def spider_dataset(self,json_path="data/processed/spider_extracted_dataset.json",max_examples=None):
+    def spider_dataset(self,json_path="data/processed/spider_extracted_dataset.jsonl",max_examples=None):
         logger.info("Loading data from spider json ")
-        with open(json_path,'r') as f:
-            self.examples = json.load(f)
+        # Parsed in blocks into a memory-mapped Arrow cache rather than json.load'ed into a list
+        self.examples = Dataset.from_json(json_path)
         
         if max_examples:
-            self.examples= self.examples[:max_examples]
+            self.examples = self.examples.select(range(min(max_examples, len(self.examples))))
         logger.info(f"Loaded max examples:{len(self.examples)}")
         
-    def wiqiSQL_dataset(self, max_examples=None, use_schema=True):
-        # importing from cache due to hugging face
-        import glob
+    def wiqiSQL_dataset(self, max_examples=None, use_schema=True, num_proc=None, data_dir=None):
+        # data_dir, else $WIKISQL_DATA_DIR, else the Hugging Face cache (see src.wikisql_loader)
         logger.info("Loading data from WikiSQL dataset")
-        cache_dir = "/home/aditya/.cache/huggingface/datasets/wikisql/default/0.1.0/*/wikisql-train.arrow"
-        train_file = glob.glob(cache_dir)[0]
-        dt = Dataset.from_file(train_file)  # for arrow file extracting only
+        # File-backed rather than projected: build_prompt_dataset only reads the prompt columns anyway,
+        # and maps over a file-backed dataset write their output to memory-mapped cache files
+        dt = load_wikisql("train", data_dir, columns=None)
         if max_examples:
             dt = dt.select(range(min(max_examples,len(dt))))# this needs a list/range not slicing supported
             # dt = dt[0:min(max_examples,len(dt))]
         logger.info(f"processing files:{len(dt)}")
-        self.examples = []
-        for d in dt:
-            tn = d["table"]["name"]
-            col = d['table']['header']
-            types = d['table']['types']
-        
-            col_def = []
-            for c,t in zip(col,types):
-                clean_col = c.replace(' ','_').replace('/','_')
-                sql_type = 'REAL' if t=='real' else 'TEXT'
-                col_def.append(f"{clean_col} {sql_type}")
-            
-            create_stat=f"CREATE TABLE {tn} ({', '.join(col_def)}"   
-            if use_schema:
-                input_text = f"{create_stat});Question: {d['question']}" 
-            else:
-                input_text = d['question']
-            
-            self.examples.append({
-                "input":input_text,
-                "output":d['sql']['human_readable']
-            })
+        # Same prompt builder as the evaluation scripts, so train and eval prompts match exactly
+        self.examples = build_prompt_dataset(dt, use_schema=use_schema, num_proc=num_proc or default_num_proc(len(dt)))
         logger.info(f"loaded {len(self.examples)} Wikisql examples")
+
+    def cached_wikisql_dataset(self, max_examples=None, use_schema=True, max_length=128, dynamic_padding=False,
+                               dedup_threshold=None, keep_per_cluster=1, num_proc=None, cache_dir=DATASET_CACHE_DIR,
+                               data_dir=None):
+        """Tokenized WikiSQL training set, built once and then reused from cache_dir.
+
+        The cache key covers the source Arrow file (path, size, mtime), max_examples,
+        use_schema, the tokenizer (name, files and transformers version), max_length,
+        dynamic_padding and the dedup settings (dedup_threshold=None skips
+        deduplicate()). A hit is a memory-mapped load_from_disk with no
+        prompt building or tokenization; a miss builds the dataset and saves it
+        under its key.
+        """
+        train_file = wikisql_file("train", data_dir)
+        stat = os.stat(train_file)
+        key_fields = {
+            "source": [os.path.abspath(train_file), stat.st_size, stat.st_mtime_ns],
+            "max_examples": max_examples,
+            "use_schema": use_schema,
+            "tokenizer": [self.tokenizer.name_or_path, fingerprint_directory(self.tokenizer.name_or_path),
+                          transformers.__version__],
+            "max_length": max_length,
+            "dynamic_padding": dynamic_padding,
+            "dedup": [dedup_threshold, keep_per_cluster] if dedup_threshold is not None else None,
+        }
+        key = hashlib.sha1(json.dumps(key_fields, sort_keys=True).encode()).hexdigest()[:16]
+        path = os.path.join(cache_dir, f"wikisql-{key}")
+        if os.path.isdir(path):
+            dataset = load_from_disk(path)
+            logger.info(f"Loaded {len(dataset)} tokenized WikiSQL examples from cache {path}")
+            return dataset
+
+        logger.info(f"No cached dataset for {key_fields}; building {path}")
+        self.wiqiSQL_dataset(max_examples=max_examples, use_schema=use_schema, num_proc=num_proc, data_dir=data_dir)
+        if dedup_threshold is not None:
+            self.deduplicate(threshold=dedup_threshold, keep_per_cluster=keep_per_cluster)
+        dataset = self.prepare_dataset(dynamic_padding=dynamic_padding, num_proc=num_proc, max_length=max_length)
+        # Save beside the final path and rename, so an interrupted build never looks like a hit
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        dataset.save_to_disk(tmp_path)
+        with open(os.path.join(tmp_path, "cache_key.json"), "w") as f:
+            json.dump(key_fields, f, indent=2)
+        if os.path.isdir(path):
+            shutil.rmtree(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+        return load_from_disk(path)
         
     
     
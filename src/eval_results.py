@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import statistics
+from src.core.logger import setup_logger
+
+# Setup logger
+logger = setup_logger(__name__)
+
+# Records held in memory before one write to disk
+BUFFER_SIZE = 512
+# Similarity histogram edges (percent) for the summary
+SIMILARITY_BUCKETS = (100, 90, 75, 50, 0)
+
+class EvalWriter:
+    """Streams per-example evaluation records to a JSONL file in buffered batches.
+
+    One record per example: question, expected, predicted, similarity, match and
+    latency_ms (None when the prediction came from the prediction store).
+    """
+    def __init__(self, path, buffer_size: int=BUFFER_SIZE):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.buffer_size = buffer_size
+        self._file = open(path, "w", encoding="utf-8")
+        self._buffer = []
+        self.written = 0
+
+    def write(self, record):
+        self._buffer.append(json.dumps(record, ensure_ascii=False))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._file.flush()
+            self.written += len(self._buffer)
+            self._buffer = []
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_results(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def summarize(records):
+    """Aggregate metrics over evaluation records"""
+    num_examples = len(records)
+    if not num_examples:
+        return {"examples": 0}
+    similarities = [r["similarity"] * 100 for r in records]
+    latencies = [r["latency_ms"] for r in records if r.get("latency_ms") is not None]
+    buckets = {}
+    remaining = similarities
+    for edge in SIMILARITY_BUCKETS:
+        buckets[f">={edge}%"] = sum(s >= edge for s in remaining)
+        remaining = [s for s in remaining if s < edge]
+    summary = {
+        "examples": num_examples,
+        "exact_match": sum(bool(r["match"]) for r in records) / num_examples * 100,
+        "similarity": statistics.mean(similarities),
+        "similarity_buckets": buckets,
+        "decoded": len(latencies),
+    }
+    if latencies:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+        summary["latency_ms"] = {"mean": statistics.mean(latencies), "p50": cuts[49], "p95": cuts[94]}
+    return summary
+
+def log_summary(name, summary):
+    logger.info(f"\n{'='*50}")
+    logger.info(f"SUMMARY: {name}")
+    logger.info(f"Total Examples: {summary['examples']}")
+    if not summary["examples"]:
+        return
+    logger.info(f"Exact Match: {summary['exact_match']:.2f}%")
+    logger.info(f"Average Similarity: {summary['similarity']:.2f}%")
+    logger.info("Similarity: " + " | ".join(f"{bucket} {count}" for bucket, count in summary["similarity_buckets"].items()))
+    if "latency_ms" in summary:
+        lat = summary["latency_ms"]
+        logger.info(f"Latency ({summary['decoded']} decoded): mean {lat['mean']:.1f}ms "
+                    f"p50 {lat['p50']:.1f}ms p95 {lat['p95']:.1f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize evaluation JSONL files written by EvalWriter")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--json", action="store_true", help="print the summaries as JSON instead")
+    args = parser.parse_args()
+
+    summaries = {path: summarize(read_results(path)) for path in args.paths}
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+    else:
+        for path, summary in summaries.items():
+            log_summary(path, summary)
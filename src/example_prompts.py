@@ -0,0 +1,20 @@
+# Example schema + question prompts shown in the app and replayed by the inference benchmark
+APP_EXAMPLES = [
+    """CREATE TABLE employees (Name TEXT, Department TEXT, Salary REAL, Years_Experience REAL);
+Question: What are the names of employees in the Engineering department?""",
+
+    """CREATE TABLE products (Product_Name TEXT, Category TEXT, Price REAL, Stock_Quantity REAL);
+Question: Which products cost more than 100 dollars?""",
+
+    """CREATE TABLE orders (Order_ID REAL, Customer_Name TEXT, Order_Date TEXT, Total_Amount REAL);
+Question: What is the total amount of all orders?""",
+
+    """CREATE TABLE students (Student_Name TEXT, Grade TEXT, GPA REAL, Graduation_Year REAL);
+Question: How many students have a GPA greater than 3.5?""",
+
+    """CREATE TABLE movies (Title TEXT, Director TEXT, Year REAL, Rating REAL, Genre TEXT);
+Question: What movies were directed by Christopher Nolan?""",
+
+    """CREATE TABLE sales (Region TEXT, Product TEXT, Revenue REAL, Units_Sold REAL);
+Question: What is the average revenue per region?""",
+]
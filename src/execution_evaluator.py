@@ -0,0 +1,127 @@
+import re
+import sqlite3
+import time
+from src.sql_canonicalizer import parse_sql
+from src.core.logger import setup_logger
+
+# Setup logger
+logger = setup_logger(__name__)
+
+# WikiSQL's structured sql encodes aggregates and operators as indices into these
+AGG_OPS = ("", "MAX", "MIN", "COUNT", "SUM", "AVG")
+COND_OPS = ("=", ">", "<", "OP")
+
+def _column_key(name):
+    # Prompts replace spaces and slashes with underscores, so the model may use either form
+    return re.sub(r'[\s/_]+', '_', name.strip()).lower()
+
+def _to_number(value):
+    try:
+        return float(str(value).replace(',', ''))
+    except ValueError:
+        return value
+
+class ExecutionEvaluator:
+    """Execution accuracy for WikiSQL: run predicted and gold SQL against the example's table.
+
+    Each table is loaded once into a shared in-memory SQLite database (one bulk
+    executemany) and reused by every question that refers to it. Text columns
+    compare case-insensitively like the official WikiSQL engine, and a query that
+    runs longer than timeout_seconds is interrupted and counted as wrong.
+    """
+    def __init__(self, timeout_seconds: float=1.0):
+        self.timeout = timeout_seconds
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._tables = {}  # WikiSQL table id -> (sqlite table name, {column key: column index}, types)
+        self._deadline = None
+        self._conn.set_progress_handler(self._check_deadline, 1000)
+        self.stats = {"tables_loaded": 0, "queries": 0, "parse_errors": 0,
+                      "execution_errors": 0, "timeouts": 0, "load_time": 0.0, "query_time": 0.0}
+
+    def gold_result(self, example):
+        """Result rows of the example's structured gold query"""
+        name, _, types = self._table(example['table'])
+        sql = example['sql']
+        agg = AGG_OPS[sql['agg']]
+        select = f"{agg}(c{sql['sel']})" if agg else f"c{sql['sel']}"
+        conds = sql['conds']
+        where, params = self._where(zip(conds['column_index'], (COND_OPS[op] for op in conds['operator_index']),
+                                        conds['condition']), types)
+        return self._execute(f"SELECT {select} FROM {name}{where}", params)
+
+    def predicted_result(self, example, predicted_sql):
+        """Result rows of a predicted query, or None if it doesn't parse, names an unknown column or fails"""
+        name, columns, types = self._table(example['table'])
+        parsed = parse_sql(predicted_sql)
+        if parsed is None or parsed.aggregate.upper() not in AGG_OPS:
+            self.stats["parse_errors"] += 1
+            return None
+        agg = parsed.aggregate.upper()
+        column = parsed.column
+        if agg and _column_key(column) not in columns:
+            # e.g. "SELECT Max Speed FROM table" is the column "Max Speed", not MAX(Speed)
+            if _column_key(f"{parsed.aggregate} {column}") in columns:
+                agg, column = "", f"{parsed.aggregate} {column}"
+        try:
+            select = columns[_column_key(column)]
+            conditions = [(columns[_column_key(cond_column)], op, value) for cond_column, op, value in parsed.conditions]
+        except KeyError:
+            self.stats["parse_errors"] += 1
+            return None
+        where, params = self._where(conditions, types)
+        return self._execute(f"SELECT {agg}(c{select}) FROM {name}{where}" if agg
+                             else f"SELECT c{select} FROM {name}{where}", params)
+
+    def execution_match(self, example, predicted_sql):
+        predicted = self.predicted_result(example, predicted_sql)
+        if predicted is None:
+            return False
+        gold = self.gold_result(example)
+        return gold is not None and sorted(predicted, key=repr) == sorted(gold, key=repr)
+
+    def _table(self, table):
+        loaded = self._tables.get(table['id'])
+        if loaded is not None:
+            return loaded
+        start_time = time.perf_counter()
+        name = f"t{len(self._tables)}"
+        types = ['REAL' if t == 'real' else 'TEXT' for t in table['types']]
+        col_defs = ', '.join(f"c{i} {t}" + (" COLLATE NOCASE" if t == 'TEXT' else "") for i, t in enumerate(types))
+        self._conn.execute(f"CREATE TABLE {name} ({col_defs})")
+        rows = [[_to_number(value) if t == 'REAL' else value for value, t in zip(row, types)]
+                for row in table['rows']]
+        self._conn.executemany(f"INSERT INTO {name} VALUES ({', '.join('?' * len(types))})", rows)
+        columns = {_column_key(header): i for i, header in enumerate(table['header'])}
+        self._tables[table['id']] = loaded = (name, columns, types)
+        self.stats["tables_loaded"] += 1
+        self.stats["load_time"] += time.perf_counter() - start_time
+        return loaded
+
+    def _where(self, conditions, types):
+        clauses = []
+        params = []
+        for column, op, value in conditions:
+            clauses.append(f"c{column} {op} ?")
+            params.append(_to_number(value) if types[column] == 'REAL' else str(value))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _check_deadline(self):
+        # Called by SQLite every 1000 VM instructions; a non-zero return interrupts the query
+        return 1 if self._deadline is not None and time.perf_counter() > self._deadline else 0
+
+    def _execute(self, query, params):
+        self.stats["queries"] += 1
+        start_time = time.perf_counter()
+        self._deadline = start_time + self.timeout
+        try:
+            return self._conn.execute(query, params).fetchall()
+        except sqlite3.OperationalError as e:
+            if "interrupted" in str(e):
+                self.stats["timeouts"] += 1
+                logger.warning(f"Query timed out after {self.timeout}s: {query}")
+            else:
+                self.stats["execution_errors"] += 1
+            return None
+        finally:
+            self._deadline = None
+            self.stats["query_time"] += time.perf_counter() - start_time
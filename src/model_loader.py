@@ -1,35 +1,285 @@
+import time
 import tensorflow as tf
 from transformers import TFAutoModelForSeq2SeqLM, AutoTokenizer
+from src.constrained_decoding import (SchemaVocabulary, TFSchemaConstrainedLogitsProcessor,
+                                      TFNoRepeatNGramXLALogitsProcessor)
+from src.speculative_decoding import TemplateDrafter, speculative_greedy
+from src.adaptive_decoding import DEFAULT_CONFIDENCE_THRESHOLD, sequence_confidence, sql_sanity_issues
+from src.quantization import load_quantized
 from src.core.logger import setup_logger
 
 # Setup logger
 logger = setup_logger(__name__)
 
+# Input lengths the compiled path pads to, so XLA traces once per bucket
+DEFAULT_BUCKETS = (32, 64, 128)
+# Batch sizes the compiled path pads to; should reach the MicroBatcher's max_batch_size
+DEFAULT_BATCH_BUCKETS = (1, 2, 4, 8)
+# Prevent repetition like SELCT SELECT
+NO_REPEAT_NGRAM_SIZE = 2
+# Beam width of generate()/generate_batch() on the fp32 model; TFLite precisions decode greedily
+DEFAULT_NUM_BEAMS = 5
+
 class CodeGenerationModel:
-    def __init__(self, model_name_or_path: str="google/flan-t5-base"):
-        logger.info(f"Loading model: {model_name_or_path}")
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name_or_path)
-        self.model = TFAutoModelForSeq2SeqLM.from_pretrained(model_name_or_path,
-                                                            trust_remote_code=True,)
+    def __init__(self, model_name_or_path: str="google/flan-t5-base",
+                 compiled: bool=False, buckets=DEFAULT_BUCKETS, precision: str="fp32",
+                 tokenizer=None, max_length: int=50, num_beams: int=None,
+                 batch_buckets=DEFAULT_BATCH_BUCKETS):
+        """precision="fp16" or "int8" serves a TFLite export of the checkpoint
+        (created on first use, see src/quantization.py) instead of the TF model.
+        Those variants always decode greedily, one prompt at a time, and
+        num_beams > 1, compiled, constrained, adaptive and speculative decoding
+        need fp32.
+        An already loaded tokenizer can be passed in to share it between models.
+        max_length and num_beams are the defaults of generate()/generate_batch(),
+        num_beams defaulting to DEFAULT_NUM_BEAMS (1 for TFLite); with
+        compiled=True exactly those settings are traced for every
+        (batch bucket, input length bucket) pair."""
+        logger.info(f"Loading model: {model_name_or_path} ({precision})")
+        self.tokenizer = tokenizer if tokenizer is not None else AutoTokenizer.from_pretrained(model_name_or_path)
+        self.precision = precision
+        self.quantized = None
+        if precision == "fp32":
+            self.model = TFAutoModelForSeq2SeqLM.from_pretrained(model_name_or_path,
+                                                                trust_remote_code=True,)
+        else:
+            self.model = None
+            self.quantized = load_quantized(model_name_or_path, precision)
         logger.info("Model and tokenizer loaded successfully")
+        
+        self.schema_vocabulary = None  # built on first constrained call
+        self.speculative_stats = dict(queries=0, decoder_calls=0, tokens=0, draft_tokens=0, accepted_tokens=0)
+        self.adaptive_stats = dict(requests=0, escalated=0, low_confidence=0, failed_sanity=0,
+                                   greedy_batches=0, greedy_time=0.0, beam_batches=0, beam_time=0.0)
+        self.max_length = max_length
+        self.num_beams = num_beams or (DEFAULT_NUM_BEAMS if self.model is not None else 1)
+        if self.num_beams > 1:
+            self._require_tf_model(f"num_beams={self.num_beams}")
+        self.compiled_generate = None
+        # One instance for every compiled call, so tf.function doesn't retrace on a new processor object
+        self.compiled_processors = [TFNoRepeatNGramXLALogitsProcessor(NO_REPEAT_NGRAM_SIZE)]
+        self.compiled_settings = set()  # (max_length, num_beams) pairs traced by compile_generation
+        self.buckets = tuple(sorted(buckets))
+        self.batch_buckets = tuple(sorted(batch_buckets))
+        if compiled:
+            self.compile_generation(buckets)
+    
+    def compile_generation(self, buckets=None, max_length: int=None, num_beams: int=None, batch_buckets=None):
+        """Route generate_batch through an XLA-compiled model.generate.
+
+        Inputs are padded up to the nearest length bucket and batches up to the
+        nearest batch bucket (larger batches are split), and every pair is traced
+        here with max_length and num_beams (the generate() defaults unless given),
+        so requests with those settings never pay for compilation. Any other
+        max_length or num_beams traces once on first use.
+        """
+        self._require_tf_model("compile_generation")
+        self.buckets = tuple(sorted(buckets or self.buckets))
+        self.batch_buckets = tuple(sorted(batch_buckets or self.batch_buckets))
+        max_length = max_length or self.max_length
+        num_beams = num_beams or self.num_beams
+        self.compiled_generate = tf.function(self.model.generate, jit_compile=True)
+        for batch_size in self.batch_buckets:
+            for bucket in self.buckets:
+                start_time = time.time()
+                warmup = self._pad_to_bucket(self.tokenizer(["warm up"] * batch_size, return_tensors="tf"), bucket)
+                self.compiled_generate(warmup["input_ids"], attention_mask=warmup["attention_mask"],
+                                       **self._generation_kwargs(max_length, num_beams, eager=False))
+                logger.info(f"Compiled batch {batch_size} x length {bucket} in {time.time() - start_time:.2f}s")
+        self.compiled_settings.add((max_length, num_beams))
     
-    def generate(self, prompt: str, max_length: int=50):
+    def generate(self, prompt: str, max_length: int=None, num_beams: int=None, constrained: bool=False):
         logger.info(f"Generating code for prompt: {prompt}")
+        code = self.generate_batch([prompt], max_length=max_length,
+                                   num_beams=num_beams, constrained=constrained)[0]
+        logger.info(f"Generated code: {code}")
+        return code
+
+    def generate_batch(self, prompts, max_length: int=None, num_beams: int=None, constrained: bool=False):
+        """Generate SQL for a list of prompts in one padded model.generate call.
+
+        max_length and num_beams default to the values given to the constructor.
+
+        Outputs are returned in the same order as the prompts. With
+        constrained=True each step may only pick SQL keywords, operators, the
+        prompt's CREATE TABLE columns and words from its question, which keeps
+        greedy (num_beams=1) or 2-beam decoding from misspelling names and values.
+        Constrained decoding always runs eagerly.
+        """
+        if not prompts:
+            return []
+        max_length = max_length or self.max_length
+        num_beams = num_beams or self.num_beams
+        if self.quantized is not None:
+            if constrained:
+                self._require_tf_model("constrained decoding")
+            if num_beams > 1:
+                self._require_tf_model(f"num_beams={num_beams}")
+            return self._generate_quantized(prompts, max_length)
+        if self.compiled_generate is not None and not constrained:
+            return self._generate_compiled(prompts, max_length, num_beams)
+        inputs = self.tokenizer(
+            list(prompts), return_tensors="tf",
+            max_length=128,
+            truncation=True,
+            padding=True,   # pad to the longest prompt in the batch
+        )
+        kwargs = self._generation_kwargs(max_length, num_beams, eager=True)
+        if constrained:
+            if self.schema_vocabulary is None:
+                self.schema_vocabulary = SchemaVocabulary(self.tokenizer)
+            allowed_mask = self.schema_vocabulary.mask(prompts, self.model.config.vocab_size)
+            kwargs["logits_processor"] = [TFSchemaConstrainedLogitsProcessor(allowed_mask)]
+        outputs = self.model.generate(
+            inputs["input_ids"],
+            attention_mask=inputs["attention_mask"],   # keep padding out of the encoder
+            **kwargs,
+        )
+        return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+    
+    def generate_adaptive(self, prompts, max_length: int=None,
+                          threshold: float=DEFAULT_CONFIDENCE_THRESHOLD, num_beams: int=None):
+        """Decode greedily and re-run only the doubtful prompts with beam search.
+
+        max_length and num_beams (the beam tier's width) default to the values
+        given to the constructor.
+
+        A greedy result is kept when its mean token log-prob is at least
+        threshold and it passes sql_sanity_issues (SELECT/FROM present, columns
+        exist in the CREATE TABLE prefix). Escalation counts and time spent in
+        each tier accumulate in self.adaptive_stats.
+        """
+        self._require_tf_model("generate_adaptive")
+        if not prompts:
+            return []
+        max_length = max_length or self.max_length
+        num_beams = num_beams or self.num_beams
+        stats = self.adaptive_stats
+        start_time = time.time()
         inputs = self.tokenizer(
-            prompt, return_tensors="tf",
+            list(prompts), return_tensors="tf",
             max_length=128,
             truncation=True,
+            padding=True,
         )
         outputs = self.model.generate(
             inputs["input_ids"],
+            attention_mask=inputs["attention_mask"],
+            output_scores=True,
+            return_dict_in_generate=True,
+            **self._generation_kwargs(max_length, 1, eager=True),
+        )
+        codes = self.tokenizer.batch_decode(outputs.sequences, skip_special_tokens=True)
+        confidences = sequence_confidence(outputs.scores, outputs.sequences, self.tokenizer.eos_token_id)
+        stats["greedy_batches"] += 1
+        stats["greedy_time"] += time.time() - start_time
+        stats["requests"] += len(prompts)
+
+        escalate = []
+        for i, (prompt, code, confidence) in enumerate(zip(prompts, codes, confidences)):
+            low_confidence = confidence < threshold
+            failed_sanity = bool(sql_sanity_issues(code, prompt))
+            stats["low_confidence"] += low_confidence
+            stats["failed_sanity"] += failed_sanity
+            if low_confidence or failed_sanity:
+                escalate.append(i)
+
+        if escalate:
+            start_time = time.time()
+            beam_codes = self.generate_batch([prompts[i] for i in escalate],
+                                             max_length=max_length, num_beams=num_beams)
+            for i, code in zip(escalate, beam_codes):
+                codes[i] = code
+            stats["escalated"] += len(escalate)
+            stats["beam_batches"] += 1
+            stats["beam_time"] += time.time() - start_time
+        return codes
+    
+    def generate_speculative(self, prompts, max_length: int=None, max_draft: int=8):
+        """Greedy decoding with template-drafted speculation, one prompt at a time.
+
+        Returns the same SQL as generate_batch(num_beams=1) while verifying
+        several drafted tokens per decoder call; max_length defaults to the
+        constructor's. Counters accumulate in self.speculative_stats.
+        """
+        self._require_tf_model("generate_speculative")
+        max_length = max_length or self.max_length
+        codes = []
+        for prompt in prompts:
+            drafter = TemplateDrafter(self.tokenizer, prompt, max_draft=max_draft)
+            codes.append(speculative_greedy(self.model, self.tokenizer, prompt, drafter,
+                                            max_length=max_length, stats=self.speculative_stats))
+        return codes
+    
+    def _require_tf_model(self, feature):
+        if self.model is None:
+            raise ValueError(f"{feature} needs the fp32 TF model; precision={self.precision} "
+                             f"serves a TFLite export that only decodes greedily")
+
+    def _generate_quantized(self, prompts, max_length):
+        codes = []
+        for prompt in prompts:
+            inputs = self.tokenizer(prompt, return_tensors="np", max_length=128, truncation=True)
+            ids = self.quantized.generate(inputs["input_ids"], inputs["attention_mask"], max_length=max_length)
+            codes.append(self.tokenizer.decode(ids, skip_special_tokens=True))
+        return codes
+    
+    def _generate_compiled(self, prompts, max_length, num_beams):
+        if (max_length, num_beams) not in self.compiled_settings:
+            logger.warning(f"max_length={max_length}, num_beams={num_beams} was not warmed up; "
+                           f"the first request per shape compiles")
+            self.compiled_settings.add((max_length, num_beams))
+        largest = self.batch_buckets[-1]
+        if len(prompts) > largest:
+            return [code for start in range(0, len(prompts), largest)
+                    for code in self._generate_compiled(prompts[start:start + largest], max_length, num_beams)]
+        inputs = self.tokenizer(
+            list(prompts), return_tensors="tf",
+            max_length=128,
+            truncation=True,
+            padding=True,
+        )
+        longest = inputs["input_ids"].shape[1]
+        bucket = next((b for b in self.buckets if b >= longest), longest)
+        batch_size = next(b for b in self.batch_buckets if b >= len(prompts))
+        inputs = self._pad_to_bucket(inputs, bucket, batch_size)
+        outputs = self.compiled_generate(
+            inputs["input_ids"],
+            attention_mask=inputs["attention_mask"],
+            **self._generation_kwargs(max_length, num_beams, eager=False),
+        )
+        # Drop the outputs of the padding rows
+        return self.tokenizer.batch_decode(outputs[:len(prompts)], skip_special_tokens=True)
+    
+    def _pad_to_bucket(self, inputs, bucket, batch_size=None):
+        """Pad inputs to bucket tokens and, if given, to batch_size rows (padding rows attend to one pad token)"""
+        rows = inputs["input_ids"].shape[0]
+        if batch_size is not None and batch_size > rows:
+            filler = tf.fill([batch_size - rows, inputs["input_ids"].shape[1]], self.tokenizer.pad_token_id)
+            mask = tf.concat([tf.ones([batch_size - rows, 1], dtype=inputs["attention_mask"].dtype),
+                              tf.zeros([batch_size - rows, inputs["input_ids"].shape[1] - 1],
+                                       dtype=inputs["attention_mask"].dtype)], axis=1)
+            inputs = {"input_ids": tf.concat([inputs["input_ids"], tf.cast(filler, inputs["input_ids"].dtype)], 0),
+                      "attention_mask": tf.concat([inputs["attention_mask"], mask], 0)}
+        extra = [[0, 0], [0, bucket - inputs["input_ids"].shape[1]]]
+        return {
+            "input_ids": tf.pad(inputs["input_ids"], extra, constant_values=self.tokenizer.pad_token_id),
+            "attention_mask": tf.pad(inputs["attention_mask"], extra, constant_values=0),
+        }
+    
+    def _generation_kwargs(self, max_length, num_beams, eager):
+        kwargs = dict(
             max_length=max_length,
-            num_beams=5,     # with 3, this issue:    Expected:  Galatasaray ✅;Predicted: Galasaray   ❌ (missing 't') 
-            early_stopping=True,   # Stop ALL PATHS
-            no_repeat_ngram_size=2,  # Prevent repetition like SELCT SELECT
+            num_beams=num_beams,     # default 5; with 3, this issue:    Expected:  Galatasaray ✅;Predicted: Galasaray   ❌ (missing 't') 
         )
-        code = self.tokenizer.decode(outputs[0],skip_special_tokens=True)
-        logger.info(f"Generated code: {code}")
-        return code
+        if num_beams > 1:
+            kwargs["early_stopping"] = True   # Stop ALL PATHS
+        # TFNoRepeatNGramLogitsProcessor only runs eagerly; the XLA path bans the same n-grams in tf ops
+        if eager:
+            kwargs["no_repeat_ngram_size"] = NO_REPEAT_NGRAM_SIZE
+        else:
+            kwargs["logits_processor"] = self.compiled_processors
+        return kwargs
 
 if __name__ == "__main__":
     logger.info("Starting code generation test")
@@ -39,7 +289,7 @@ if __name__ == "__main__":
     "Generate SQL query: Find orders where status equals 'active'",
     "Generate SQL query: Count rows in products table"
     ]
-    for prompt in prompts:
+    for prompt, code in zip(prompts, model.generate_batch(prompts)):
         print("-"*25)
-        model.generate(prompt)
+        logger.info(f"{prompt} -> {code}")
     print("Done")
\ No newline at end of file
@@ -0,0 +1,146 @@
+import copy
+import gc
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from transformers import AutoTokenizer
+from src.model_loader import CodeGenerationModel
+from src.core.logger import setup_logger
+
+# Setup logger
+logger = setup_logger(__name__)
+
+TOKENIZER_FILES = ("tokenizer.json", "tokenizer_config.json", "special_tokens_map.json", "spiece.model")
+
+def tokenizer_fingerprint(model_name_or_path):
+    """Hash of a checkpoint's tokenizer files; equal fingerprints mean one loaded tokenizer can be copied for both"""
+    digest = hashlib.sha1()
+    if not os.path.isdir(model_name_or_path):
+        digest.update(model_name_or_path.encode())
+        return digest.hexdigest()
+    for name in TOKENIZER_FILES:
+        path = os.path.join(model_name_or_path, name)
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                digest.update(name.encode() + b":" + f.read())
+    return digest.hexdigest()
+
+def model_memory_bytes(model):
+    return sum(weight.shape.num_elements() * weight.dtype.size for weight in model.model.weights)
+
+class ModelPool:
+    """Loads CodeGenerationModels by name on demand inside one process.
+
+    Checkpoints whose tokenizer files are identical read them only once, but
+    every model gets its own copy: a fast tokenizer can't be called from two
+    threads at once ("Already borrowed"), and each model's batcher runs in
+    its own thread. When the loaded weights exceed memory_budget_mb, least
+    recently used models are evicted (the one just requested always stays).
+    Given a CheckpointWatcher, a model whose checkpoint changes on disk is
+    dropped and reloaded on its next request.
+    """
+    def __init__(self, model_dirs, memory_budget_mb: float=4096, watcher=None):
+        self.model_dirs = dict(model_dirs)  # name -> checkpoint directory
+        self.memory_budget = memory_budget_mb * 1e6
+
+        self._models = OrderedDict()  # name -> (model, bytes), least recently used first
+        self._tokenizers = {}  # tokenizer fingerprint -> loaded tokenizer, copied for each model
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+        self.load_time = 0.0
+        self.invalidations = 0
+        self.watcher = watcher
+        if watcher is not None:
+            watcher.subscribe(self.invalidate)
+
+    def get(self, name):
+        if name not in self.model_dirs:
+            raise KeyError(f"Unknown model {name!r}, choose from {sorted(self.model_dirs)}")
+        if self.watcher is not None:
+            self.watcher.check()
+        with self._lock:
+            if name in self._models:
+                return self._hit(name)
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # One loader per name; a second request for the same model waits for the first
+        with load_lock:
+            with self._lock:
+                if name in self._models:
+                    return self._hit(name)
+            start_time = time.time()
+            model = CodeGenerationModel(model_name_or_path=self.model_dirs[name],
+                                        tokenizer=self._tokenizer_for(self.model_dirs[name]))
+            size = model_memory_bytes(model)
+            with self._lock:
+                self._models[name] = (model, size)
+                self.loads += 1
+                self.load_time += time.time() - start_time
+                self._evict(keep=name)
+            logger.info(f"Loaded model {name!r} ({size/1e6:.0f} MB) in {time.time() - start_time:.2f}s")
+            return model
+
+    def loaded(self):
+        with self._lock:
+            return list(self._models)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": list(self._models),
+                "memory_mb": sum(size for _, size in self._models.values()) / 1e6,
+                "memory_budget_mb": self.memory_budget / 1e6,
+                "loads": self.loads,
+                "hits": self.hits,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "load_time_s": round(self.load_time, 3),
+                "tokenizers": len(self._tokenizers),
+            }
+
+    def invalidate(self, name):
+        """Drop model name (e.g. its checkpoint was retrained) so the next get() loads it again"""
+        with self._lock:
+            dropped = self._models.pop(name, None) is not None
+            self.invalidations += 1
+        if dropped:
+            logger.info(f"Checkpoint of {name!r} changed, dropped the loaded model")
+            gc.collect()
+
+    def _hit(self, name):
+        # Caller holds the lock
+        self._models.move_to_end(name)
+        self.hits += 1
+        return self._models[name][0]
+
+    def _tokenizer_for(self, model_dir):
+        fingerprint = tokenizer_fingerprint(model_dir)
+        with self._lock:
+            tokenizer = self._tokenizers.get(fingerprint)
+        if tokenizer is None:
+            tokenizer = AutoTokenizer.from_pretrained(model_dir)
+            with self._lock:
+                tokenizer = self._tokenizers.setdefault(fingerprint, tokenizer)
+        return copy.deepcopy(tokenizer)
+
+    def _evict(self, keep):
+        # Caller holds the lock
+        total = sum(size for _, size in self._models.values())
+        evicted = False
+        for name in list(self._models):
+            if total <= self.memory_budget:
+                break
+            if name == keep:
+                continue
+            _, size = self._models.pop(name)
+            total -= size
+            self.evictions += 1
+            evicted = True
+            logger.info(f"Evicted model {name!r} to stay within {self.memory_budget/1e6:.0f} MB")
+        if evicted:
+            gc.collect()
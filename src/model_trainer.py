@@ -1,18 +1,70 @@
 from transformers import TFAutoModelForSeq2SeqLM, AutoTokenizer
 from datasets import load_from_disk
+import numpy as np
+import pyarrow.compute as pc
 import tensorflow as tf
+import time
 from src.core.logger import setup_logger
 
 # Setup logger
 logger = setup_logger(__name__)
 
+# Shuffled examples sorted by length together when bucketing; larger pools give tighter buckets but less randomness
+BUCKET_POOL_BATCHES = 50
+# Rows per Arrow batch when measuring sequence lengths
+LENGTH_BATCH_SIZE = 10_000
+
+class ExamplesPerSecond(tf.keras.callbacks.Callback):
+    """Logs training throughput (examples/sec) at the end of every epoch"""
+    def __init__(self, num_examples):
+        super().__init__()
+        self.num_examples = num_examples
+        self.history = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        rate = self.num_examples / (time.perf_counter() - self._start)
+        self.history.append(rate)
+        if logs is not None:
+            logs["examples_per_sec"] = rate
+        logger.info(f"Epoch {epoch + 1}: {rate:.1f} examples/sec")
+
+def bucketed_batches(lengths, batch_size, pool_batches=BUCKET_POOL_BATCHES, rng=np.random):
+    """Index batches of similar-length examples, in random order.
+
+    Examples are shuffled, taken pool_batches batches at a time, sorted by length
+    inside each pool and cut into batches; the batches are then shuffled again.
+    """
+    order = rng.permutation(len(lengths))
+    pool = batch_size * pool_batches
+    batches = []
+    for start in range(0, len(order), pool):
+        chunk = order[start:start + pool]
+        chunk = chunk[np.argsort(lengths[chunk], kind="stable")]
+        batches.extend(chunk[i:i + batch_size] for i in range(0, len(chunk), batch_size))
+    return [batches[i] for i in rng.permutation(len(batches))]
+
+def padding_ratio(batches, input_lengths, label_lengths, padded_length=None):
+    """Fraction of input+label positions that are padding; padded_length=None pads to each batch's longest"""
+    real = padded = 0
+    for batch in batches:
+        for lengths in (input_lengths[batch], label_lengths[batch]):
+            real += int(lengths.sum())
+            padded += len(batch) * (padded_length or int(lengths.max()))
+    return 1 - real / padded if padded else 0.0
+
 class ModelTrainer:
-    def __init__(self, model_name_or_path="google/flan-t5-base", dataset_path=None):
+    def __init__(self, model_name_or_path="google/flan-t5-base", dataset_path=None, dataset=None):
         logger.info(f"Loading model: {model_name_or_path}")
         self.tokenizer = AutoTokenizer.from_pretrained(model_name_or_path)
         self.model = TFAutoModelForSeq2SeqLM.from_pretrained(model_name_or_path)
         
-        if dataset_path:
+        if dataset is not None:
+            # e.g. SQLDatasetBuilder.cached_wikisql_dataset(), already memory-mapped
+            self.dataset = dataset
+        elif dataset_path:
             logger.info(f"Loading dataset from: {dataset_path}")
             self.dataset = load_from_disk(dataset_path)
         else:
@@ -21,7 +73,14 @@ class ModelTrainer:
         logger.info("Model and tokenizer loaded successfully!")
     
     def train(self, epochs=3,lr = 0.00005,#5e-5
-              batch_size=4, callbacks=None):
+              batch_size=4, callbacks=None, bucket_by_length=False):
+        """Fine-tune on the loaded dataset.
+
+        bucket_by_length batches similar-length examples together and pads each
+        batch only to its own longest sequence (labels with -100); use it with a
+        dataset saved with save_dataset(dynamic_padding=True); the bucketed
+        padding ratio is logged too. Examples/sec is logged after every epoch.
+        """
         if self.dataset is None:
             logger.error("No dataset loaded. Provide dataset_path in __init__")
             return 
@@ -35,21 +94,67 @@ class ModelTrainer:
         logger.info("Model compiled successfully with gradient clipping")
         
         logger.info("converting data into tf format")
-        tf_dataset = self.model.prepare_tf_dataset(
-            self.dataset,
-            batch_size=batch_size,
-            shuffle =True,
-            tokenizer=self.tokenizer,
-            collate_fn=None, # NEW ADDED
-        )
+        if bucket_by_length:
+            input_lengths, label_lengths = self._sequence_lengths()
+            tf_dataset = self._bucketed_tf_dataset(input_lengths, batch_size)
+            ratio = padding_ratio(bucketed_batches(input_lengths, batch_size), input_lengths, label_lengths)
+            logger.info(f"Padding ratio: {ratio:.1%} of input/label positions are padding (length-bucketed batches)")
+        else:
+            tf_dataset = self.model.prepare_tf_dataset(
+                self.dataset,
+                batch_size=batch_size,
+                shuffle =True,
+                tokenizer=self.tokenizer,
+                collate_fn=None, # NEW ADDED
+            )
         
         logger.info("Dataset converted to tf and starting training...")
         
-        history = self.model.fit(tf_dataset,epochs=epochs,verbose=1, callbacks = callbacks)
+        throughput = ExamplesPerSecond(len(self.dataset))
+        history = self.model.fit(tf_dataset,epochs=epochs,verbose=1, callbacks = [throughput, *(callbacks or [])])
         logger.info("Training completed.")
         return history
         
         
+    def _sequence_lengths(self):
+        """Unpadded input and label length of every example, counted with Arrow compute batch by batch"""
+        columns = self.dataset.select_columns(["attention_mask", "labels"]).with_format("arrow")
+        input_lengths, label_lengths = [], []
+        for batch in columns.iter(batch_size=LENGTH_BATCH_SIZE):
+            masks = batch.column("attention_mask").combine_chunks()
+            labels = batch.column("labels").combine_chunks()
+            input_lengths.append(np.bincount(pc.list_parent_indices(masks).to_numpy(),
+                                             weights=pc.list_flatten(masks).to_numpy(), minlength=len(batch)))
+            real = pc.filter(pc.list_parent_indices(labels), pc.not_equal(pc.list_flatten(labels), -100))
+            label_lengths.append(np.bincount(real.to_numpy(), minlength=len(batch)))
+        return (np.concatenate(input_lengths or [np.zeros(0)]).astype(np.int64),
+                np.concatenate(label_lengths or [np.zeros(0)]).astype(np.int64))
+
+    def _bucketed_tf_dataset(self, input_lengths, batch_size):
+        pad_token_id = self.tokenizer.pad_token_id
+        columns = self.dataset.select_columns(["input_ids", "attention_mask", "labels"])
+
+        def pad(rows, value):
+            # Rows from a fixed-length dataset are cut back to the batch's longest real sequence
+            rows = [[token for token in row if token != value] if value == -100 else row for row in rows]
+            width = max(len(row) for row in rows)
+            return np.array([row + [value] * (width - len(row)) for row in rows], dtype=np.int32)
+
+        def batches():
+            # Called once per epoch, so every epoch gets a fresh bucketing
+            for indices in bucketed_batches(input_lengths, batch_size):
+                rows = columns[indices]
+                lengths = input_lengths[indices]
+                yield {
+                    "input_ids": pad([row[:n] for row, n in zip(rows["input_ids"], lengths)], pad_token_id),
+                    "attention_mask": pad([row[:n] for row, n in zip(rows["attention_mask"], lengths)], 0),
+                    "labels": pad(rows["labels"], -100),
+                }
+
+        spec = tf.TensorSpec(shape=(None, None), dtype=tf.int32)
+        signature = {"input_ids": spec, "attention_mask": spec, "labels": spec}
+        return tf.data.Dataset.from_generator(batches, output_signature=signature).prefetch(tf.data.AUTOTUNE)
+
     def save_model(self,output_path = "models/trained_sql_model"):        
         self.model.save_pretrained(output_path)
         logger.info(f"starting to save model at {output_path}")
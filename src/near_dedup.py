@@ -0,0 +1,102 @@
+import re
+import zlib
+import numpy as np
+from src.sql_canonicalizer import canonical_key
+from src.core.logger import setup_logger
+
+# Setup logger
+logger = setup_logger(__name__)
+
+WORD_PATTERN = re.compile(r'\w+')
+# Mersenne prime for the universal hashes; 32-bit shingle hashes times a < 2^31 still fit in uint64
+MERSENNE_PRIME = (1 << 31) - 1
+# Examples whose MinHash signatures are computed in one vectorized step
+SIGNATURE_CHUNK = 1024
+
+def shingles(text, size=3):
+    """32-bit hashes of the word size-grams of text (the whole text if it is shorter)"""
+    words = WORD_PATTERN.findall(text.lower())
+    grams = [' '.join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))]
+    return [zlib.crc32(gram.encode()) for gram in grams]
+
+def minhash_signatures(texts, num_perm=128, seed=0):
+    """(len(texts), num_perm) MinHash signatures; equal-value fraction estimates Jaccard similarity"""
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    for start in range(0, len(texts), SIGNATURE_CHUNK):
+        hashed = [shingles(text) for text in texts[start:start + SIGNATURE_CHUNK]]
+        values = np.fromiter((h for hashes in hashed for h in hashes), dtype=np.uint64)
+        offsets = np.cumsum([0] + [len(hashes) for hashes in hashed[:-1]])
+        permuted = (values[:, None] * a + b) % MERSENNE_PRIME
+        signatures[start:start + len(hashed)] = np.minimum.reduceat(permuted, offsets, axis=0)
+    return signatures
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def near_duplicate_clusters(inputs, outputs, threshold=0.8, num_perm=128, bands=16, contexts=None):
+    """Cluster id per example; examples share a cluster when their context and SQL are the same and questions are near-duplicates.
+
+    contexts (e.g. the CREATE TABLE schema of each prompt) must be identical,
+    since WikiSQL SQL always says "FROM table" and can't tell tables apart.
+    Outputs must match exactly after canonicalization (so "... WHERE year = 2001"
+    and "... WHERE year = 2002" stay apart however similar the questions are);
+    inputs are compared by MinHash over word 3-grams. Locality-sensitive
+    hashing with bands x (num_perm / bands) rows only compares examples that
+    collide in some band, and a candidate joins a cluster when its estimated
+    Jaccard similarity reaches threshold.
+    """
+    if num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+    contexts = contexts if contexts is not None else [""] * len(inputs)
+    output_keys = [hash((context, canonical_key(output))) for context, output in zip(contexts, outputs)]
+    signatures = minhash_signatures(inputs, num_perm=num_perm)
+    rows = num_perm // bands
+    parent = list(range(len(inputs)))
+    for band in range(bands):
+        buckets = {}
+        band_values = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        for i, (output_key, value) in enumerate(zip(output_keys, band_values)):
+            first = buckets.setdefault((output_key, value.tobytes()), i)
+            if first == i:
+                continue
+            root_first, root_i = _find(parent, first), _find(parent, i)
+            if root_first != root_i and (signatures[first] == signatures[i]).mean() >= threshold:
+                parent[max(root_first, root_i)] = min(root_first, root_i)
+    return np.array([_find(parent, i) for i in range(len(inputs))])
+
+def dedupe_indices(inputs, outputs, threshold=0.8, keep_per_cluster=1, contexts=None, **lsh_kwargs):
+    """Indices to keep (in original order) and a report of how much the data shrank.
+
+    Examples are only ever merged within the same context (see near_duplicate_clusters).
+
+    keep_per_cluster > 1 keeps that many examples of every cluster, which
+    downweights large clusters of paraphrases instead of collapsing them.
+    """
+    contexts = contexts if contexts is not None else [""] * len(inputs)
+    clusters = near_duplicate_clusters(inputs, outputs, threshold=threshold, contexts=contexts, **lsh_kwargs)
+    exact = len(inputs) - len(set(zip(contexts, inputs, outputs)))
+    kept = []
+    seen = {}
+    for i, cluster in enumerate(clusters):
+        seen[cluster] = seen.get(cluster, 0) + 1
+        if seen[cluster] <= keep_per_cluster:
+            kept.append(i)
+    report = {
+        "examples": len(inputs),
+        "kept": len(kept),
+        "removed": len(inputs) - len(kept),
+        "exact_duplicates": exact,
+        "clusters": len(seen),
+        "largest_cluster": max(seen.values(), default=0),
+        "shrink": 1 - len(kept) / len(inputs) if len(inputs) else 0.0,
+    }
+    logger.info(f"Dedup (threshold {threshold}, keep {keep_per_cluster}/cluster): {report['examples']} -> "
+                f"{report['kept']} examples ({report['shrink']:.1%} smaller; {report['exact_duplicates']} exact "
+                f"duplicates, largest cluster {report['largest_cluster']})")
+    return kept, report
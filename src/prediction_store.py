@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from src.core.fingerprint import fingerprint_directory
+from src.core.logger import setup_logger
+
+# Setup logger
+logger = setup_logger(__name__)
+
+# SQLite's default limit on bound parameters per statement is 999
+QUERY_CHUNK = 500
+
+def prompt_hash(prompt):
+    return hashlib.sha1(prompt.encode()).hexdigest()
+
+def params_key(params):
+    """Stable key for a dict of decoding parameters"""
+    return json.dumps(params, sort_keys=True)
+
+class PredictionStore:
+    """On-disk SQLite store of generated SQL for one model checkpoint and decoding setup.
+
+    Rows are keyed by (checkpoint fingerprint, decoding parameters, prompt hash),
+    so retraining the checkpoint or changing num_beams etc. never reuses stale
+    predictions, while metric changes can be rescored without decoding again.
+    Safe to share between processes.
+    """
+    def __init__(self, path, model_dir, decode_params):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.model = fingerprint_directory(model_dir)
+        self.params = params_key(decode_params)
+        self._conn = sqlite3.connect(path, timeout=60)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS predictions (
+                model TEXT, params TEXT, prompt_hash TEXT, prompt TEXT, prediction TEXT, created_at REAL,
+                PRIMARY KEY (model, params, prompt_hash)
+            )""")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, prompts):
+        """Stored prediction for each prompt, None where it hasn't been generated yet"""
+        hashes = [prompt_hash(prompt) for prompt in prompts]
+        found = {}
+        for start in range(0, len(hashes), QUERY_CHUNK):
+            chunk = hashes[start:start + QUERY_CHUNK]
+            rows = self._conn.execute(
+                f"SELECT prompt_hash, prediction FROM predictions WHERE model = ? AND params = ? "
+                f"AND prompt_hash IN ({', '.join('?' * len(chunk))})",
+                [self.model, self.params, *chunk],
+            )
+            found.update(rows)
+        predictions = [found.get(h) for h in hashes]
+        missing = predictions.count(None)
+        self.hits += len(predictions) - missing
+        self.misses += missing
+        return predictions
+
+    def put_many(self, prompts, predictions):
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?, ?)",
+                [(self.model, self.params, prompt_hash(prompt), prompt, prediction, now)
+                 for prompt, prediction in zip(prompts, predictions)],
+            )
+
+    def count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM predictions WHERE model = ? AND params = ?",
+                                  (self.model, self.params)).fetchone()[0]
+
+    def close(self):
+        self._conn.close()
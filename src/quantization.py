@@ -0,0 +1,111 @@
+import argparse
+import os
+import numpy as np
+import tensorflow as tf
+from src.speculative_decoding import banned_ngram_tokens
+from src.core.logger import setup_logger
+
+# Setup logger
+logger = setup_logger(__name__)
+
+# fp32 is the regular TF checkpoint; the others are TFLite exports next to it
+PRECISIONS = ("fp32", "fp16", "int8")
+
+def tflite_dir(model_dir, precision):
+    return os.path.join(model_dir, "tflite", precision)
+
+def export_tflite(model, output_dir, precision):
+    """Export the encoder and a last-step decoder of a TF seq2seq model to TFLite.
+
+    int8 uses dynamic-range quantization: weights stay int8 in memory and the
+    CPU kernels quantize activations on the fly. fp16 halves the file size, but
+    the CPU interpreter dequantizes those weights to fp32 when it loads them.
+    """
+    if precision not in ("fp16", "int8"):
+        raise ValueError(f"TFLite export supports fp16 and int8, got {precision}")
+    d_model = model.config.d_model
+
+    @tf.function(input_signature=[
+        tf.TensorSpec([1, None], tf.int32, name="input_ids"),
+        tf.TensorSpec([1, None], tf.int32, name="attention_mask"),
+    ])
+    def encode(input_ids, attention_mask):
+        return model.get_encoder()(input_ids, attention_mask=attention_mask).last_hidden_state
+
+    @tf.function(input_signature=[
+        tf.TensorSpec([1, None], tf.int32, name="input_ids"),
+        tf.TensorSpec([1, None], tf.int32, name="attention_mask"),
+        tf.TensorSpec([1, None, d_model], tf.float32, name="encoder_hidden_states"),
+        tf.TensorSpec([1, None], tf.int32, name="decoder_input_ids"),
+    ])
+    def decode(input_ids, attention_mask, encoder_hidden_states, decoder_input_ids):
+        outputs = model(
+            input_ids,   # ignored by the encoder since encoder_outputs is given
+            attention_mask=attention_mask,
+            encoder_outputs=(encoder_hidden_states,),
+            decoder_input_ids=decoder_input_ids,
+            use_cache=False,
+        )
+        return outputs.logits[:, -1, :]
+
+    os.makedirs(output_dir, exist_ok=True)
+    for name, fn in (("encoder", encode), ("decoder", decode)):
+        converter = tf.lite.TFLiteConverter.from_concrete_functions([fn.get_concrete_function()], model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if precision == "fp16":
+            converter.target_spec.supported_types = [tf.float16]
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+        path = os.path.join(output_dir, f"{name}.tflite")
+        with open(path, "wb") as f:
+            f.write(converter.convert())
+        logger.info(f"Exported {precision} {name} to {path} ({os.path.getsize(path)/1e6:.1f} MB)")
+
+class TFLiteSeq2Seq:
+    """Greedy decoding over an exported encoder/decoder pair.
+
+    Mirrors CodeGenerationModel's eager greedy settings (no_repeat_ngram_size=2).
+    The decoder reruns over the whole prefix each step since the export has no
+    KV cache.
+    """
+    def __init__(self, export_dir, decoder_start_token_id: int=0, eos_token_id: int=1):
+        # Signature runners resize the dynamic sequence dimensions on every call
+        self.encoder = tf.lite.Interpreter(model_path=os.path.join(export_dir, "encoder.tflite")).get_signature_runner()
+        self.decoder = tf.lite.Interpreter(model_path=os.path.join(export_dir, "decoder.tflite")).get_signature_runner()
+        self.decoder_start_token_id = decoder_start_token_id
+        self.eos_token_id = eos_token_id
+
+    def generate(self, input_ids, attention_mask, max_length: int=50, no_repeat_ngram_size: int=2):
+        input_ids = np.asarray(input_ids, dtype=np.int32).reshape(1, -1)
+        attention_mask = np.asarray(attention_mask, dtype=np.int32).reshape(1, -1)
+        hidden = self.encoder(input_ids=input_ids, attention_mask=attention_mask)["output_0"]
+        decoded = [self.decoder_start_token_id]
+        while len(decoded) < max_length and decoded[-1] != self.eos_token_id:
+            logits = self.decoder(input_ids=input_ids, attention_mask=attention_mask,
+                                  encoder_hidden_states=hidden,
+                                  decoder_input_ids=np.asarray([decoded], dtype=np.int32))["output_0"][0]
+            banned = banned_ngram_tokens(decoded, no_repeat_ngram_size)
+            if banned:
+                logits[banned] = -np.inf
+            decoded.append(int(np.argmax(logits)))
+        return decoded
+
+def load_quantized(model_dir, precision):
+    """TFLiteSeq2Seq for a checkpoint, exporting it on first use"""
+    from transformers import AutoConfig, TFAutoModelForSeq2SeqLM
+    export_dir = tflite_dir(model_dir, precision)
+    if not os.path.exists(os.path.join(export_dir, "decoder.tflite")):
+        logger.info(f"No {precision} export in {export_dir}, exporting from {model_dir}")
+        export_tflite(TFAutoModelForSeq2SeqLM.from_pretrained(model_dir), export_dir, precision)
+    config = AutoConfig.from_pretrained(model_dir)
+    return TFLiteSeq2Seq(export_dir, decoder_start_token_id=config.decoder_start_token_id,
+                         eos_token_id=config.eos_token_id)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a trained checkpoint to fp16 / int8 TFLite")
+    parser.add_argument("--model", default="models/trained_wikisql_model")
+    parser.add_argument("--precision", choices=PRECISIONS[1:], default="int8")
+    args = parser.parse_args()
+
+    from transformers import TFAutoModelForSeq2SeqLM
+    model = TFAutoModelForSeq2SeqLM.from_pretrained(args.model)
+    export_tflite(model, tflite_dir(args.model, args.precision), args.precision)
@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import OrderedDict
+from src.schema_parser import WHITESPACE
+from src.core.logger import setup_logger
+
+# Setup logger
+logger = setup_logger(__name__)
+
+def normalize_prompt(prompt):
+    """Cache key for a prompt: the prompt with runs of whitespace collapsed.
+
+    Nothing else is normalized: any other difference (case, "Years Experience"
+    vs "Years_Experience") reaches the model as different text and may change
+    the SQL it generates.
+    """
+    return WHITESPACE.sub(' ', prompt).strip()
+
+class ResponseCache:
+    """Bounded LRU cache with a TTL for generated SQL, keyed on normalize_prompt.
+
+    Entries are namespaced by model name. Given a CheckpointWatcher, the cache
+    checks it on every lookup and drops a model's entries as soon as its
+    checkpoint changes; a ModelPool subscribed to the same watcher reloads the
+    weights at the same moment. Answers generated across an invalidation are
+    not stored (see epoch), so once the watcher has seen a retrained checkpoint
+    no answer from the old weights is served.
+    """
+    def __init__(self, maxsize: int=1024, ttl_seconds: float=3600, watcher=None):
+        self.maxsize = maxsize
+        self.ttl = ttl_seconds
+        self.watcher = watcher
+
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._epochs = {}  # namespace -> number of invalidations
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        if watcher is not None:
+            watcher.subscribe(self.invalidate)
+
+    def get(self, prompt, namespace=""):
+        if self.watcher is not None:
+            self.watcher.check()
+        key = (namespace, normalize_prompt(prompt))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def epoch(self, namespace=""):
+        """Token to take before generating; put(..., epoch=token) drops the answer if namespace was invalidated since"""
+        with self._lock:
+            return self._epochs.get(namespace, 0)
+
+    def put(self, prompt, value, namespace="", epoch=None):
+        key = (namespace, normalize_prompt(prompt))
+        with self._lock:
+            if epoch is not None and epoch != self._epochs.get(namespace, 0):
+                return
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def invalidate(self, namespace):
+        """Drop every entry of namespace (e.g. when that model's checkpoint changed)"""
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == namespace]
+            for key in stale:
+                del self._entries[key]
+            self._epochs[namespace] = self._epochs.get(namespace, 0) + 1
+            self.invalidations += 1
+        logger.info(f"Checkpoint of {namespace!r} changed, dropped {len(stale)} cached responses")
@@ -0,0 +1,31 @@
+import re
+
+# Matches the "CREATE TABLE name (col TYPE, ...);Question: ..." prompts used for
+# training and by app.parse_input. The opening parenthesis is optional because
+# older validation prompts were built without it.
+PROMPT_PATTERN = re.compile(
+    r'^\s*create\s+table\s+(?P<table>[^\s(]+)\s*\(?(?P<columns>.*?)\)?\s*;\s*question\s*:\s*(?P<question>.*)$',
+    re.IGNORECASE | re.DOTALL,
+)
+WHITESPACE = re.compile(r'\s+')
+
+def parse_prompt(prompt):
+    """Split a schema prompt into (table, [(column, type), ...], question).
+
+    Returns None when the prompt does not follow the CREATE TABLE format.
+    """
+    match = PROMPT_PATTERN.match(prompt)
+    if not match:
+        return None
+    columns = []
+    for col_def in match.group('columns').split(','):
+        parts = col_def.split()
+        if not parts:
+            continue
+        # Last word is the type when it looks like one, otherwise the column is untyped
+        if len(parts) > 1 and parts[-1].upper() in ('TEXT', 'REAL'):
+            columns.append(('_'.join(parts[:-1]), parts[-1].upper()))
+        else:
+            columns.append(('_'.join(parts), ''))
+    question = WHITESPACE.sub(' ', match.group('question')).strip()
+    return match.group('table'), columns, question
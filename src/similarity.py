@@ -0,0 +1,106 @@
+import numpy as np
+from src.sql_canonicalizer import TOKEN_PATTERN
+
+# Pairs are sorted by length and scored in chunks of this size to keep padding small
+CHUNK_SIZE = 1024
+
+def _encode(texts, level):
+    """All texts as one flat int32 array of character or token codes, plus each text's length"""
+    if level == "char":
+        # UTF-32 gives exactly one code unit per character
+        codes = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype=np.uint32).astype(np.int32)
+        return codes, np.array([len(text) for text in texts], dtype=np.int64)
+    vocabulary = {}
+    tokenized = [TOKEN_PATTERN.findall(text) for text in texts]
+    codes = np.array([vocabulary.setdefault(token, len(vocabulary)) for tokens in tokenized for token in tokens],
+                     dtype=np.int32)
+    return codes, np.array([len(tokens) for tokens in tokenized], dtype=np.int64)
+
+def _gather(codes, starts, lengths, fill, step=1):
+    """(batch, longest) matrix of codes[start + step*k] for k < length, padded with fill"""
+    positions = np.arange(int(lengths.max()) if len(lengths) else 0)
+    valid = positions < lengths[:, None]
+    if not codes.size:
+        return np.full(valid.shape, fill, dtype=np.int32)
+    index = np.where(valid, starts[:, None] + step * positions, 0)
+    return np.where(valid, codes[index], fill).astype(np.int32)
+
+def _common_length(source, target):
+    # Padding uses different fill values on each side, so it always counts as a difference
+    width = min(source.shape[1], target.shape[1])
+    if width == 0:
+        return np.zeros(len(source), dtype=np.int64)
+    differ = source[:, :width] != target[:, :width]
+    return np.where(differ.any(axis=1), differ.argmax(axis=1), width)
+
+def levenshtein_distances(source, target, source_lengths, target_lengths):
+    """Edit distance between each row of two padded (batch, length) code matrices.
+
+    One Python iteration per source position; each computes the whole DP row for
+    every pair at once. The left-to-right insertion dependency within a row is
+    resolved with a running minimum: row[j] = min_k (candidate[k] + j - k).
+    """
+    # Position-major so each DP step works on contiguous rows
+    source = np.ascontiguousarray(source.T)
+    target = np.ascontiguousarray(target.T)
+    columns = np.arange(target.shape[0] + 1, dtype=np.int32)[:, None]
+
+    batch = np.arange(source.shape[1])
+    row = np.repeat(columns, source.shape[1], axis=1)
+    candidate = np.empty_like(row)
+    mismatch = np.empty(target.shape, dtype=bool)
+    distances = target_lengths.copy()  # pairs with an empty source
+    for i in range(1, source.shape[0] + 1):
+        np.not_equal(target, source[i - 1], out=mismatch)
+        np.add(row[:-1], mismatch, out=candidate[1:])
+        np.add(row[1:], 1, out=row[1:])
+        np.minimum(candidate[1:], row[1:], out=candidate[1:])
+        candidate[0] = i
+        candidate -= columns
+        np.minimum.accumulate(candidate, axis=0, out=row)
+        row += columns
+        done = source_lengths == i
+        if done.any():
+            distances[done] = row[target_lengths[done], batch[done]]
+    return distances
+
+def levenshtein_ratio(predictions, references, level="char"):
+    """1 - edit distance / longer length for each (prediction, reference) pair, case-insensitive.
+
+    level="char" compares characters; level="token" compares SQL tokens
+    (keywords, operators, punctuation and words), so one wrong column name costs
+    one edit however long it is.
+    """
+    if len(predictions) != len(references):
+        raise ValueError(f"Got {len(predictions)} predictions for {len(references)} references")
+    if level not in ("char", "token"):
+        raise ValueError(f"level must be 'char' or 'token', got {level!r}")
+    if not len(predictions):
+        return np.ones(0)
+
+    codes, lengths = _encode([text.lower() for text in (*predictions, *references)], level)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    n = len(predictions)
+    source_starts, target_starts = starts[:n], starts[n:]
+    source_lengths, target_lengths = lengths[:n], lengths[n:]
+    longest = np.maximum(source_lengths, target_lengths)
+
+    # A shared prefix or suffix never changes the edit distance, and predictions share most of the gold query
+    prefix = _common_length(_gather(codes, source_starts, source_lengths, -1),
+                            _gather(codes, target_starts, target_lengths, -2))
+    source_starts, target_starts = source_starts + prefix, target_starts + prefix
+    source_lengths, target_lengths = source_lengths - prefix, target_lengths - prefix
+    suffix = _common_length(_gather(codes, source_starts + source_lengths - 1, source_lengths, -1, step=-1),
+                            _gather(codes, target_starts + target_lengths - 1, target_lengths, -2, step=-1))
+    source_lengths, target_lengths = source_lengths - suffix, target_lengths - suffix
+
+    distances = np.zeros(n, dtype=np.int64)
+    order = np.lexsort((target_lengths, source_lengths))
+    for start in range(0, n, CHUNK_SIZE):
+        chunk = order[start:start + CHUNK_SIZE]
+        distances[chunk] = levenshtein_distances(
+            _gather(codes, source_starts[chunk], source_lengths[chunk], -1),
+            _gather(codes, target_starts[chunk], target_lengths[chunk], -2),
+            source_lengths[chunk], target_lengths[chunk],
+        )
+    return np.where(longest > 0, 1 - distances / np.maximum(longest, 1), 1.0)
@@ -0,0 +1,112 @@
+import numpy as np
+import tensorflow as tf
+from src.constrained_decoding import AGGREGATES
+from src.schema_parser import parse_prompt
+
+class TemplateDrafter:
+    """Proposes continuations for WikiSQL-shaped SQL without running a model.
+
+    Candidate token sequences come from the grammar (SELECT [AGG] col FROM
+    table WHERE col = val AND ...), from the prompt's columns and from the
+    question, where most WHERE values are copied from. Given the tokens decoded
+    so far, the drafter finds the longest suffix (up to max_ngram tokens) that
+    also appears in a candidate and proposes the tokens that follow it there.
+    """
+    def __init__(self, tokenizer, prompt, max_draft: int=8, max_ngram: int=3):
+        self.max_draft = max_draft
+        self.max_ngram = max_ngram
+
+        def ids(text):
+            return tokenizer(text, add_special_tokens=False)["input_ids"]
+
+        parsed = parse_prompt(prompt)
+        columns, question = ([], prompt) if parsed is None else ([c for c, _ in parsed[1]], parsed[2])
+        candidates = [ids(question)]
+        for col in columns:
+            # Gold SQL spells columns with spaces; listed first so its continuations win ties
+            for name in dict.fromkeys((col.replace('_', ' '), col)):
+                candidates.append(ids(f"SELECT {name} FROM table WHERE {name} ="))
+                candidates.append(ids(f"AND {name} ="))
+                for agg in AGGREGATES:
+                    candidates.append(ids(f"SELECT {agg} {name} FROM table WHERE"))
+        self.start = ids("SELECT")
+
+        # n-gram -> continuation, first occurrence wins
+        self.index = {}
+        for seq in candidates:
+            for n in range(1, max_ngram + 1):
+                for i in range(len(seq) - n):
+                    self.index.setdefault(tuple(seq[i:i + n]), seq[i + n:i + n + max_draft])
+
+    def propose(self, generated):
+        """Draft tokens to follow `generated` (decoded ids without the decoder start token)"""
+        if not generated:
+            return list(self.start[:self.max_draft])
+        for n in range(min(self.max_ngram, len(generated)), 0, -1):
+            continuation = self.index.get(tuple(generated[-n:]))
+            if continuation:
+                return list(continuation)
+        return []
+
+def banned_ngram_tokens(sequence, ngram_size):
+    # Same rule as TFNoRepeatNGramLogitsProcessor: tokens that would repeat an n-gram already in sequence
+    if ngram_size <= 0 or len(sequence) + 1 < ngram_size:
+        return []
+    prefix = tuple(sequence[len(sequence) - ngram_size + 1:])
+    return [sequence[i + ngram_size - 1] for i in range(len(sequence) - ngram_size + 1)
+            if tuple(sequence[i:i + ngram_size - 1]) == prefix]
+
+def speculative_greedy(model, tokenizer, prompt, drafter, max_length: int=50,
+                       no_repeat_ngram_size: int=2, stats=None):
+    """Greedy decoding where each decoder call verifies a whole draft.
+
+    One forward pass over decoded + draft gives the greedy choice after every
+    draft prefix. The longest matching prefix of the draft is accepted plus the
+    model's own token at the first mismatch, so the result is the same token
+    sequence model.generate(num_beams=1, no_repeat_ngram_size=...) produces,
+    with fewer sequential decoder calls. The decoder is rerun over the full
+    prefix each call (no KV cache); sequences here are short.
+    """
+    inputs = tokenizer(prompt, return_tensors="tf", max_length=128, truncation=True)
+    encoder_outputs = model.get_encoder()(inputs["input_ids"], attention_mask=inputs["attention_mask"])
+    eos_id = tokenizer.eos_token_id
+    decoded = [model.config.decoder_start_token_id]
+    calls = proposed = accepted = 0
+
+    while len(decoded) < max_length and decoded[-1] != eos_id:
+        draft = drafter.propose(decoded[1:])[:max_length - len(decoded) - 1]
+        outputs = model(
+            inputs["input_ids"],   # ignored by the encoder since encoder_outputs is given
+            encoder_outputs=encoder_outputs,
+            attention_mask=inputs["attention_mask"],
+            decoder_input_ids=tf.constant([decoded + draft]),
+            use_cache=False,
+        )
+        calls += 1
+        logits = outputs.logits[0, len(decoded) - 1:].numpy()
+
+        # Walk the draft: position k holds the greedy choice after decoded + draft[:k]
+        new_tokens = []
+        for k in range(len(draft) + 1):
+            scores = logits[k]
+            banned = banned_ngram_tokens(decoded + new_tokens, no_repeat_ngram_size)
+            if banned:
+                scores = scores.copy()
+                scores[banned] = -np.inf
+            token = int(np.argmax(scores))
+            new_tokens.append(token)
+            if k == len(draft) or token != draft[k]:
+                break
+            accepted += 1
+            if token == eos_id:
+                break
+        proposed += len(draft)
+        decoded.extend(new_tokens)
+
+    if stats is not None:
+        stats["queries"] += 1
+        stats["decoder_calls"] += calls
+        stats["tokens"] += len(decoded) - 1
+        stats["draft_tokens"] += proposed
+        stats["accepted_tokens"] += accepted
+    return tokenizer.decode(decoded, skip_special_tokens=True)
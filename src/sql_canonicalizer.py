@@ -0,0 +1,149 @@
+import re
+from collections import namedtuple
+
+AGGREGATES = frozenset({"count", "sum", "avg", "max", "min"})
+OPERATORS = frozenset({"=", "<", ">", "<=", ">=", "<>", "!="})
+
+# Single pass over the lowercased SQL: quoted values, operators, punctuation, then everything else
+TOKEN_PATTERN = re.compile(r'"[^"]*"?|<=|>=|<>|!=|[=<>(),]|[^\s=<>(),"]+')
+# Spacing around slashes, hyphens, commas and inside parentheses
+PUNCT_SPACING = re.compile(r'\s*([/,-])\s*|\(\s+|\s+\)')
+PUNCT_REPLACEMENTS = {'/': '_', ',': ', ', '-': '-'}
+
+# Characters normalization() drops or unifies (quotes, periods, stray symbols, unicode dashes)
+CHAR_TABLE = str.maketrans({'"': None, '.': None, '−': '-', '–': '-', '—': '-',
+                            '√': None, '→': None, '↓': None, '↑': None, '✓': None, '✗': None, '×': None})
+ARTICLES = frozenset({"the", "a", "an"})
+# Two-character operators a model sometimes emits with a space inside ("< =")
+SPLIT_OPERATORS = {("<", "="): "<=", (">", "="): ">=", ("<", ">"): "<>", ("!", "="): "!="}
+
+CanonicalSQL = namedtuple("CanonicalSQL", ["aggregate", "column", "table", "conditions"])
+
+def _spacing(match):
+    if match.group(1):
+        return PUNCT_REPLACEMENTS[match.group(1)]
+    return match.group(0).strip()
+
+def normalize_text(tokens):
+    """Normalize a column name or value the way normalization() treats it inside a full query"""
+    text = ' '.join(tokens).translate(CHAR_TABLE).replace('sept', 'sep')
+    words = PUNCT_SPACING.sub(_spacing, text).split()
+    kept = []
+    skip_next = False
+    for i, word in enumerate(words):
+        if skip_next:
+            skip_next = False
+            continue
+        following = words[i + 1] if i + 1 < len(words) else None
+        if following is not None and (word in ARTICLES or (word == "week" and following[0].isdigit())):
+            continue
+        if word == "short" and following == "film" and i + 2 < len(words):
+            skip_next = True
+            continue
+        kept.append(word)
+    return ' '.join(kept).rstrip('-')
+
+def _tokenize(sql):
+    """(lowercased token, start, end) for each token of sql, with split operators joined back up"""
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(sql):
+        token = match.group(0).lower()
+        if tokens and (tokens[-1][0], token) in SPLIT_OPERATORS:
+            tokens[-1] = (SPLIT_OPERATORS[tokens[-1][0], token], tokens[-1][1], match.end())
+        else:
+            tokens.append((token, match.start(), match.end()))
+    return tokens
+
+def _split(tokens):
+    """Token index ranges of a SELECT [AGG[(]]col[)] FROM table [WHERE col op value AND|OR ...] query.
+
+    WikiSQL's human_readable writes aggregates without parentheses (SELECT COUNT
+    Player FROM table), models trained on it may or may not add them. A value may
+    be empty: symbols like √ normalize to nothing and models often drop them.
+
+    Returns (aggregate, select, table, [[(column, operator, value)], ...]) with each
+    part a (start, end) range into tokens and conditions grouped into the terms of
+    an OR (a single group without OR), or None if the query doesn't have that shape.
+    """
+    if len(tokens) < 4 or tokens[0] != "select" or "from" not in tokens:
+        return None
+    from_at = tokens.index("from")
+    select = (1, from_at)
+    aggregate = ""
+    if from_at >= 4 and tokens[1] in AGGREGATES and tokens[2] == "(" and tokens[from_at - 1] == ")":
+        aggregate, select = tokens[1], (3, from_at - 1)
+    elif from_at >= 3 and tokens[1] in AGGREGATES:
+        aggregate, select = tokens[1], (2, from_at)
+    if select[0] == select[1]:
+        return None
+
+    where_at = tokens.index("where", from_at) if "where" in tokens[from_at:] else len(tokens)
+    groups = [[]]
+    if where_at < len(tokens):
+        start = op_at = None
+        for i in range(where_at + 1, len(tokens) + 1):
+            token = tokens[i] if i < len(tokens) else "and"
+            if start is None:
+                start = i
+            if token in OPERATORS and op_at is None:
+                op_at = i
+            elif token in ("and", "or"):
+                # Needs a non-empty column before the operator
+                if op_at is None or op_at == start:
+                    return None
+                groups[-1].append(((start, op_at), tokens[op_at], (op_at + 1, i)))
+                if token == "or":
+                    groups.append([])
+                start = op_at = None
+    return aggregate, select, (from_at + 1, where_at), groups
+
+def parse_sql(sql):
+    """The parts of a WikiSQL-style query as they appear in it (original case and spacing).
+
+    Returns CanonicalSQL-shaped text without normalization, conditions in query
+    order, or None if the query doesn't parse or uses OR (WikiSQL queries never do).
+    """
+    tokens = _tokenize(sql)
+    parts = _split([token for token, _, _ in tokens])
+    if parts is None or len(parts[3]) > 1:
+        return None
+    aggregate, select, table, (conditions,) = parts
+
+    def text(span):
+        if span[0] == span[1]:
+            return ""
+        part = sql[tokens[span[0]][1]:tokens[span[1] - 1][2]].strip().strip('"')
+        if len(part) >= 2 and part[0] == part[-1] == "'":
+            part = part[1:-1]
+        return part
+    return CanonicalSQL(aggregate, text(select), text(table),
+                        tuple((text(column), op, text(value)) for column, op, value in conditions))
+
+def canonicalize(sql):
+    """Parse WikiSQL-style SQL into a normalized CanonicalSQL, or None if it doesn't parse.
+
+    Conditions are sorted so their order in the query doesn't matter. With OR,
+    conditions is the sorted tuple of OR terms, each a sorted tuple of
+    conditions, so reordered terms match but "a AND b" never equals "a OR b".
+    """
+    tokens = [token for token, _, _ in _tokenize(sql)]
+    parts = _split(tokens)
+    if parts is None:
+        return None
+    aggregate, select, table, groups = parts
+
+    def text(span):
+        return normalize_text(tokens[span[0]:span[1]])
+    terms = [tuple(sorted((text(column), op, text(value)) for column, op, value in group)) for group in groups]
+    return CanonicalSQL(aggregate, text(select), text(table), terms[0] if len(terms) == 1 else tuple(sorted(terms)))
+
+def canonical_key(sql):
+    """Hashable comparison key: the parsed structure, or the normalized token stream if parsing fails"""
+    parsed = canonicalize(sql)
+    if parsed is not None:
+        return parsed
+    return normalize_text([token for token, _, _ in _tokenize(sql)])
+
+def sql_match(predicted, expected):
+    """Exact match on canonical structure (aggregate, select column, table, condition set)"""
+    return canonical_key(predicted) == canonical_key(expected)
@@ -0,0 +1,88 @@
+import argparse
+import glob
+import hashlib
+import os
+import resource
+import time
+import pyarrow as pa
+from datasets import Dataset
+from datasets.table import InMemoryTable
+from src.core.logger import setup_logger
+
+# Setup logger
+logger = setup_logger(__name__)
+
+# Directory holding wikisql-{train,validation,test}.arrow; overrides the Hugging Face cache lookup
+WIKISQL_ENV_VAR = "WIKISQL_DATA_DIR"
+HF_CACHE_GLOB = os.path.join("~", ".cache", "huggingface", "datasets", "wikisql", "default", "0.1.0", "*")
+# Tiny synthetic WikiSQL splits shipped with the repo, for smoke runs without the real data
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "wikisql_fixture")
+
+# Everything the prompts, exact match and the structured gold SQL need; None keeps a whole column.
+# table.rows (the cell contents, most of the file) is only needed for execution accuracy.
+PROJECTED_COLUMNS = {"question": None, "table": ("id", "name", "header", "types"), "sql": None}
+
+def wikisql_file(split, data_dir=None):
+    """Path of wikisql-<split>.arrow: data_dir, else $WIKISQL_DATA_DIR, else the Hugging Face cache"""
+    data_dir = data_dir or os.environ.get(WIKISQL_ENV_VAR)
+    if data_dir:
+        candidates = [os.path.join(data_dir, f"wikisql-{split}.arrow")]
+    else:
+        candidates = sorted(glob.glob(os.path.join(os.path.expanduser(HF_CACHE_GLOB), f"wikisql-{split}.arrow")))
+    for path in candidates:
+        if os.path.isfile(path):
+            return path
+    raise FileNotFoundError(
+        f"No WikiSQL {split} split found in {data_dir or os.path.expanduser(HF_CACHE_GLOB)}; "
+        f"pass data_dir or set {WIKISQL_ENV_VAR} (e.g. to {FIXTURE_DIR})")
+
+def _project(table, columns):
+    arrays, names = [], []
+    for name, fields in columns.items():
+        column = table.column(name)
+        if fields is not None:
+            # Rebuild the struct from the wanted children only; the arrays still point into the mapped file
+            struct_type = column.type
+            kept = [struct_type[struct_type.get_field_index(field)] for field in fields]
+            chunks = []
+            for chunk in column.chunks:
+                children = dict(zip((field.name for field in struct_type), chunk.flatten()))
+                chunks.append(pa.StructArray.from_arrays([children[field.name] for field in kept], fields=kept,
+                                                         mask=chunk.is_null() if chunk.null_count else None))
+            column = pa.chunked_array(chunks, type=pa.struct(kept))
+        arrays.append(column)
+        names.append(name)
+    return pa.Table.from_arrays(arrays, names=names)
+
+def load_wikisql(split="train", data_dir=None, columns=PROJECTED_COLUMNS):
+    """One WikiSQL split as a Dataset read from a memory-mapped Arrow file.
+
+    Only the columns (and struct fields) in columns are exposed, without copying
+    anything: pages of the file are read from disk only when touched, and the
+    table cell contents are never decoded into Python objects. columns=None
+    gives the full rows (Dataset.from_file) for execution accuracy.
+    """
+    path = wikisql_file(split, data_dir)
+    if columns is None:
+        return Dataset.from_file(path)
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_stream(source).read_all()
+    stat = os.stat(path)
+    fingerprint = hashlib.sha1(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}:{columns}".encode()).hexdigest()
+    # The file's own metadata describes the full features, so let datasets infer them from the projection
+    projected = _project(table, columns).replace_schema_metadata(None)
+    return Dataset(InMemoryTable(projected), fingerprint=fingerprint)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare full vs projected loading of a WikiSQL split")
+    parser.add_argument("--split", default="train")
+    parser.add_argument("--data-dir", default=None)
+    parser.add_argument("--full", action="store_true", help="load every column (as the loaders did before)")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    dataset = load_wikisql(args.split, args.data_dir, columns=None if args.full else PROJECTED_COLUMNS)
+    prompts = [(example["table"]["name"], example["question"], example["sql"]["human_readable"]) for example in dataset]
+    elapsed = time.perf_counter() - start_time
+    logger.info(f"{len(prompts)} {args.split} examples ({'full' if args.full else 'projected'}) iterated in "
+                f"{elapsed:.2f}s, peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3:.0f}MB")
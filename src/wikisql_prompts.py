@@ -0,0 +1,42 @@
+from src.core.logger import setup_logger
+
+# Setup logger
+logger = setup_logger(__name__)
+
+# Flattened WikiSQL columns the prompt needs; everything else (e.g. table rows) is never read
+PROMPT_COLUMNS = ["table.name", "table.header", "table.types", "question", "sql.human_readable"]
+
+def wikisql_prompt(table_name, header, types, question, use_schema=True):
+    """CREATE TABLE name (col TYPE, ...);Question: ... prompt the models are trained and evaluated on"""
+    if not use_schema:
+        return question
+    col_defs = ', '.join(f"{c.replace(' ', '_').replace('/', '_')} {'REAL' if t == 'real' else 'TEXT'}"
+                         for c, t in zip(header, types))
+    return f"CREATE TABLE {table_name} ({col_defs});Question: {question}"
+
+def _prompt_batch(names, headers, types, questions, outputs, use_schema):
+    return {
+        "input": [wikisql_prompt(*row, use_schema=use_schema) for row in zip(names, headers, types, questions)],
+        "output": outputs,
+    }
+
+def build_prompt_dataset(dataset, use_schema=True, num_proc=None, batch_size=1000):
+    """Map a raw WikiSQL split to a Dataset with "input" prompts and "output" SQL.
+
+    Runs as a batched map over the flattened table columns, so rows are handled
+    as column lists rather than one dict per example; num_proc splits it across
+    processes.
+    """
+    flat = dataset.flatten()
+    prompts = flat.map(
+        _prompt_batch,
+        batched=True,
+        batch_size=batch_size,
+        input_columns=PROMPT_COLUMNS,
+        fn_kwargs={"use_schema": use_schema},
+        remove_columns=flat.column_names,
+        num_proc=num_proc,
+        desc="Building WikiSQL prompts",
+    )
+    logger.info(f"Built {len(prompts)} WikiSQL prompts")
+    return prompts
@@ -0,0 +1,22 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from src.batching import MicroBatcher
+
+def submit_all(generate_fn, prompts):
+    batcher = MicroBatcher(generate_fn, max_batch_size=len(prompts), max_wait_ms=200)
+    try:
+        futures = [batcher.submit(prompt) for prompt in prompts]
+        return [future.exception(timeout=5) or future.result() for future in futures]
+    finally:
+        batcher.close()
+
+def test_outputs_reach_their_callers_in_order():
+    assert submit_all(lambda prompts: [p.upper() for p in prompts], ["a", "b", "c"]) == ["A", "B", "C"]
+
+@pytest.mark.parametrize("outputs", [["A"], ["A", "B", "C", "D"]])
+def test_wrong_number_of_outputs_fails_every_request(outputs):
+    results = submit_all(lambda prompts: outputs, ["a", "b", "c"])
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,25 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+import tensorflow as tf
+from transformers.generation import TFNoRepeatNGramLogitsProcessor
+from src.constrained_decoding import TFNoRepeatNGramXLALogitsProcessor
+
+VOCAB_SIZE = 12
+BUFFER_LENGTH = 16
+
+@pytest.mark.parametrize("ngram_size", [1, 2, 3])
+def test_xla_ngram_ban_matches_eager_processor(ngram_size):
+    rng = np.random.RandomState(ngram_size)
+    # A small vocabulary so repeated n-grams are common; positions past cur_len are junk, as in generate's buffer
+    input_ids = tf.constant(rng.randint(0, 4, size=(6, BUFFER_LENGTH)), dtype=tf.int32)
+    scores = tf.constant(rng.randn(6, VOCAB_SIZE), dtype=tf.float32)
+    eager = TFNoRepeatNGramLogitsProcessor(ngram_size)
+    compiled = tf.function(TFNoRepeatNGramXLALogitsProcessor(ngram_size).__call__, jit_compile=True)
+    for cur_len in range(1, BUFFER_LENGTH + 1):
+        expected = eager(input_ids[:, :cur_len], scores, cur_len)
+        actual = compiled(input_ids, scores, tf.constant(cur_len))
+        np.testing.assert_array_equal(actual.numpy(), expected.numpy())
@@ -0,0 +1,22 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.dataset_builder import MIN_EXAMPLES_PER_PROC, SQLDatasetBuilder, default_num_proc
+from src.wikisql_loader import FIXTURE_DIR
+
+TOKENIZER_DIR = os.path.join(os.path.dirname(__file__), "..", "models", "trained_wikisql_model")
+
+def test_default_num_proc_scales_with_size():
+    cores = os.cpu_count() or 1
+    assert default_num_proc(10) == 1
+    assert default_num_proc(MIN_EXAMPLES_PER_PROC * 2) == min(2, cores)
+    assert default_num_proc(MIN_EXAMPLES_PER_PROC * 1000) == cores
+
+def test_multiprocess_tokenization_matches_single_process():
+    builder = SQLDatasetBuilder(tokenizer_name=TOKENIZER_DIR)
+    builder.wiqiSQL_dataset(use_schema=True, num_proc=2, data_dir=FIXTURE_DIR)
+    parallel = builder.prepare_dataset(dynamic_padding=True, num_proc=2, batch_size=8)
+    single = builder.prepare_dataset(dynamic_padding=True, num_proc=1, batch_size=8)
+    assert len(parallel) == len(builder.examples) == 40
+    assert parallel.to_dict() == single.to_dict()
@@ -0,0 +1,50 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import copy
+import pytest
+from src.execution_evaluator import ExecutionEvaluator
+from src.wikisql_loader import FIXTURE_DIR, load_wikisql
+
+# Never finishes on its own; only the progress-handler deadline stops it
+ENDLESS_QUERY = "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n) SELECT COUNT(*) FROM n"
+
+@pytest.fixture(scope="module")
+def examples():
+    # Execution needs table.rows, so load every column
+    return list(load_wikisql("validation", FIXTURE_DIR, columns=None))
+
+def test_gold_sql_matches_gold_structure(examples):
+    evaluator = ExecutionEvaluator()
+    for example in examples:
+        assert evaluator.execution_match(example, example["sql"]["human_readable"]), example["sql"]["human_readable"]
+    assert evaluator.stats["parse_errors"] == evaluator.stats["execution_errors"] == 0
+    assert evaluator.stats["tables_loaded"] == len({example["table"]["id"] for example in examples})
+
+def test_parenthesized_aggregate_executes_like_bare_form(examples):
+    evaluator = ExecutionEvaluator()
+    example = next(example for example in examples if example["sql"]["human_readable"].startswith("SELECT COUNT "))
+    bare = example["sql"]["human_readable"]
+    column = bare[len("SELECT COUNT "):bare.index(" FROM table")]
+    parenthesized = bare.replace(f"COUNT {column}", f"COUNT({column})", 1)
+    assert evaluator.predicted_result(example, parenthesized) == evaluator.gold_result(example)
+
+def test_column_starting_with_an_aggregate_name_is_a_column(examples):
+    evaluator = ExecutionEvaluator()
+    example = copy.deepcopy(next(example for example in examples if example["sql"]["agg"] == 0))
+    table = example["table"]
+    selected = example["sql"]["sel"]
+    # "Max Speed" must be read as that column, not MAX(Speed)
+    table["header"][selected] = "Max Speed"
+    table["id"] = table["id"] + "-max-speed"
+    predicted = "SELECT Max Speed FROM table" + example["sql"]["human_readable"].split(" FROM table", 1)[1]
+    result = evaluator.predicted_result(example, predicted)
+    assert result is not None and result == evaluator.gold_result(example)
+
+def test_runaway_query_times_out(examples):
+    evaluator = ExecutionEvaluator(timeout_seconds=0.05)
+    assert evaluator._execute(ENDLESS_QUERY, []) is None
+    assert evaluator.stats["timeouts"] == 1
+    # The deadline is cleared afterwards, so the next query runs normally
+    assert evaluator.execution_match(examples[0], examples[0]["sql"]["human_readable"])
@@ -0,0 +1,45 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.dataset_builder import SQLDatasetBuilder
+from src.near_dedup import dedupe_indices
+
+SQL = "SELECT Population FROM table WHERE City = Paris"
+
+def builder_with(examples):
+    # deduplicate only needs self.examples; skip loading a tokenizer
+    builder = SQLDatasetBuilder.__new__(SQLDatasetBuilder)
+    builder.examples = examples
+    return builder
+
+def test_same_question_and_sql_over_different_schemas_both_survive():
+    builder = builder_with([
+        {"input": "CREATE TABLE table_1 (City TEXT, Population REAL);Question: What is the population of Paris?",
+         "output": SQL},
+        {"input": "CREATE TABLE table_2 (City TEXT, Population REAL, Mayor TEXT);Question: What is the population of Paris?",
+         "output": SQL},
+    ])
+    report = builder.deduplicate(threshold=0.5)
+    assert len(builder.examples) == 2
+    assert report["exact_duplicates"] == 0
+
+def test_near_duplicate_questions_over_the_same_schema_are_merged():
+    schema = "CREATE TABLE table_1 (City TEXT, Population REAL);Question: "
+    builder = builder_with([
+        {"input": schema + "What is the population of Paris?", "output": SQL},
+        {"input": schema + "what is the population of paris ?", "output": SQL},
+        {"input": schema + "What is the population of Paris?", "output": SQL},
+        {"input": schema + "What is the population of Rome?", "output": SQL.replace("Paris", "Rome")},
+    ])
+    report = builder.deduplicate(threshold=0.5)
+    assert [ex["input"] for ex in builder.examples] == [schema + "What is the population of Paris?",
+                                                         schema + "What is the population of Rome?"]
+    assert report["exact_duplicates"] == 1
+
+def test_keep_per_cluster_caps_instead_of_collapsing():
+    questions = ["What is the population of Paris?", "what is the population of paris ?",
+                 "What is the population of Paris city?"]
+    kept, report = dedupe_indices(questions, [SQL] * 3, threshold=0.5, keep_per_cluster=2)
+    assert kept == [0, 1]
+    assert report["largest_cluster"] == 3
@@ -0,0 +1,41 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.fingerprint import CheckpointWatcher
+from src.response_cache import ResponseCache, normalize_prompt
+
+def test_key_only_collapses_whitespace():
+    prompt = "CREATE TABLE t (Years Experience REAL);Question: How many years?"
+    assert normalize_prompt("  CREATE TABLE t (Years   Experience REAL);Question:\nHow many years? ") == prompt
+    assert normalize_prompt(prompt.replace("Years Experience", "Years_Experience")) != normalize_prompt(prompt)
+    assert normalize_prompt(prompt.replace("CREATE TABLE", "create table")) != normalize_prompt(prompt)
+
+def retrain(model_dir):
+    with open(os.path.join(model_dir, "tf_model.h5"), "a") as f:
+        f.write("new weights")
+
+def test_changed_checkpoint_invalidates_cache_and_other_subscribers(tmp_path):
+    dirs = {"a": str(tmp_path / "a"), "b": str(tmp_path / "b")}
+    for model_dir in dirs.values():
+        os.makedirs(model_dir)
+        retrain(model_dir)
+    watcher = CheckpointWatcher(dirs, check_interval=0)
+    dropped = []
+    watcher.subscribe(dropped.append)  # e.g. ModelPool.invalidate
+    cache = ResponseCache(watcher=watcher)
+    cache.put("q", "SELECT old", namespace="a")
+    cache.put("q", "SELECT b", namespace="b")
+    assert cache.get("q", namespace="a") == "SELECT old"
+
+    epoch = cache.epoch("a")
+    retrain(dirs["a"])
+    assert cache.get("q", namespace="a") is None
+    assert cache.get("q", namespace="b") == "SELECT b"
+    assert dropped == ["a"]
+
+    # Generated before the invalidation, possibly by the old weights
+    cache.put("q", "SELECT old", namespace="a", epoch=epoch)
+    assert cache.get("q", namespace="a") is None
+    cache.put("q", "SELECT new", namespace="a", epoch=cache.epoch("a"))
+    assert cache.get("q", namespace="a") == "SELECT new"
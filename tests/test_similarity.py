@@ -0,0 +1,62 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+from src.similarity import levenshtein_ratio
+from src.sql_canonicalizer import TOKEN_PATTERN
+
+def edit_distance(a, b):
+    """Textbook O(len(a) * len(b)) dynamic program"""
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+        previous = current
+    return previous[-1]
+
+def brute_force_ratio(prediction, reference, level):
+    prediction, reference = prediction.lower(), reference.lower()
+    if level == "token":
+        prediction, reference = TOKEN_PATTERN.findall(prediction), TOKEN_PATTERN.findall(reference)
+    longest = max(len(prediction), len(reference))
+    return 1 - edit_distance(prediction, reference) / longest if longest else 1.0
+
+def random_pairs(rng, count):
+    words = ["SELECT", "COUNT", "FROM", "table", "WHERE", "AND", "=", "<", "Points", "No.", "Dave Smith", "2007", "é"]
+    def text():
+        return " ".join(rng.choice(words, size=rng.randint(0, 8)))
+    def mutate(value):
+        chars = list(value)
+        for _ in range(rng.randint(0, 4)):
+            position = rng.randint(0, len(chars) + 1)
+            operation = rng.randint(3)
+            if operation == 0 or not chars:
+                chars.insert(position, rng.choice(list("abcXYZ =")))
+            elif operation == 1:
+                del chars[min(position, len(chars) - 1)]
+            else:
+                chars[min(position, len(chars) - 1)] = rng.choice(list("abcXYZ"))
+        return "".join(chars)
+    # Mostly near-identical pairs (shared prefixes/suffixes are trimmed), some unrelated ones
+    pairs = []
+    for _ in range(count):
+        reference = text()
+        pairs.append((mutate(reference) if rng.rand() < 0.8 else text(), reference))
+    return pairs
+
+@pytest.mark.parametrize("level", ["char", "token"])
+def test_matches_brute_force_dynamic_program(level):
+    rng = np.random.RandomState(0)
+    pairs = random_pairs(rng, 2500)  # more than one chunk
+    predictions, references = zip(*pairs)
+    expected = [brute_force_ratio(p, r, level) for p, r in pairs]
+    np.testing.assert_allclose(levenshtein_ratio(list(predictions), list(references), level=level), expected)
+
+def test_edge_cases():
+    np.testing.assert_allclose(levenshtein_ratio(["", "abc", "", "ABC"], ["", "", "abc", "abc"]), [1, 0, 0, 1])
+    assert levenshtein_ratio([], []).shape == (0,)
+    with pytest.raises(ValueError):
+        levenshtein_ratio(["a"], [])
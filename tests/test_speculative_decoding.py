@@ -0,0 +1,107 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import tensorflow as tf
+from transformers import AutoTokenizer, T5Config, TFT5ForConditionalGeneration
+from src.model_loader import CodeGenerationModel
+from src.speculative_decoding import TemplateDrafter, speculative_greedy
+from src.wikisql_loader import FIXTURE_DIR, load_wikisql
+from src.wikisql_prompts import wikisql_prompt
+
+# Only the tokenizer is needed; the model weights are stored with git-lfs
+TOKENIZER_DIR = os.path.join(os.path.dirname(__file__), "..", "models", "trained_wikisql_model")
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    return AutoTokenizer.from_pretrained(TOKENIZER_DIR)
+
+def oracle_decode(drafter, gold):
+    """Speculative decoding against a model that always emits gold: (accepted draft tokens, decoder calls)"""
+    decoded, accepted, calls = [], 0, 0
+    while len(decoded) < len(gold):
+        draft = drafter.propose(decoded)
+        k = 0
+        while k < len(draft) and len(decoded) + k < len(gold) and draft[k] == gold[len(decoded) + k]:
+            k += 1
+        decoded = gold[:len(decoded) + k + 1]  # accepted prefix plus the model's own token
+        accepted += k
+        calls += 1
+    return accepted, calls
+
+def aggregate_examples(tokenizer):
+    for example in load_wikisql("validation", FIXTURE_DIR):
+        if example["sql"]["agg"]:
+            table = example["table"]
+            prompt = wikisql_prompt(table["name"], table["header"], table["types"], example["question"])
+            gold = tokenizer(example["sql"]["human_readable"], add_special_tokens=False)["input_ids"]
+            yield example, TemplateDrafter(tokenizer, prompt), gold + [tokenizer.eos_token_id]
+
+def test_aggregate_drafts_follow_wikisql_format(tokenizer):
+    # Gold writes "SELECT COUNT col", so nothing may draft a parenthesis after the aggregate
+    for example, drafter, gold in aggregate_examples(tokenizer):
+        aggregate = example["sql"]["human_readable"].split(" ")[1]
+        draft = drafter.propose(tokenizer(f"SELECT {aggregate}", add_special_tokens=False)["input_ids"])
+        assert draft and not tokenizer.decode(draft).lstrip().startswith("(")
+
+def test_aggregate_acceptance_length(tokenizer):
+    accepted = calls = tokens = 0
+    for _, drafter, gold in aggregate_examples(tokenizer):
+        example_accepted, example_calls = oracle_decode(drafter, gold)
+        accepted += example_accepted
+        calls += example_calls
+        tokens += len(gold)
+    assert calls
+    # With the parenthesized template this was 1.16 tokens per call and 0.46 calls per token
+    assert accepted / calls >= 1.25
+    assert calls / tokens <= 0.45
+
+PROMPTS = [
+    "CREATE TABLE table_1 (Player TEXT, No. REAL, Position TEXT);Question: What position does number 3 play?",
+    "CREATE TABLE table_2 (Team TEXT, Year REAL);Question: How many teams played in 2001?",
+    "CREATE TABLE table_3 (Max Speed REAL, Car TEXT);Question: What is the max speed of the Ferrari?",
+]
+MAX_LENGTH = 24
+
+@pytest.fixture(scope="module")
+def tiny_model(tokenizer, tmp_path_factory):
+    """CodeGenerationModel around a randomly initialised one-layer T5; needs no download"""
+    tf.random.set_seed(0)
+    config = T5Config(vocab_size=len(tokenizer), d_model=16, d_ff=32, d_kv=8, num_layers=1, num_heads=2,
+                      decoder_start_token_id=tokenizer.pad_token_id, pad_token_id=tokenizer.pad_token_id,
+                      eos_token_id=tokenizer.eos_token_id)
+    model = TFT5ForConditionalGeneration(config)
+    model(model.dummy_inputs)
+    path = str(tmp_path_factory.mktemp("tiny_t5"))
+    model.save_pretrained(path)
+    return CodeGenerationModel(path, tokenizer=tokenizer, max_length=MAX_LENGTH, num_beams=1)
+
+class CorruptedReplayDrafter:
+    """Drafts the true greedy continuation with every third token wrong, so drafts are partly accepted"""
+    def __init__(self, reference, vocab_size):
+        self.reference = reference
+        self.vocab_size = vocab_size
+
+    def propose(self, generated):
+        draft = list(self.reference[len(generated):len(generated) + 6])
+        for k in range(2, len(draft), 3):
+            draft[k] = (draft[k] + 1) % self.vocab_size
+        return draft
+
+def test_speculative_matches_greedy_generate_batch(tiny_model):
+    stats = tiny_model.speculative_stats
+    assert tiny_model.generate_speculative(PROMPTS) == tiny_model.generate_batch(PROMPTS, num_beams=1)
+    # A random model rejects nearly every template draft
+    assert stats["draft_tokens"] > stats["accepted_tokens"]
+
+def test_speculative_matches_greedy_with_partly_accepted_drafts(tiny_model, tokenizer):
+    stats = dict(queries=0, decoder_calls=0, tokens=0, draft_tokens=0, accepted_tokens=0)
+    for prompt in PROMPTS:
+        expected = tiny_model.generate_batch([prompt], num_beams=1)[0]
+        reference = tokenizer(expected, add_special_tokens=False)["input_ids"] + [tokenizer.eos_token_id]
+        drafter = CorruptedReplayDrafter(reference, len(tokenizer))
+        assert speculative_greedy(tiny_model.model, tokenizer, prompt, drafter,
+                                  max_length=MAX_LENGTH, stats=stats) == expected
+    assert 0 < stats["accepted_tokens"] < stats["draft_tokens"]
+    assert stats["decoder_calls"] < stats["tokens"]
@@ -0,0 +1,61 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from src.sql_canonicalizer import canonicalize, parse_sql, sql_match
+from examples.wikisql_validation import normalization
+
+# (expected, predicted, normalization() exact match, sql_match()) for every known case where the
+# old string-normalization metric and the canonicalizer disagree, plus the decisions behind them
+CASES = [
+    # Same answer in both: surface variations that were already handled
+    ("SELECT Player FROM table WHERE No. = 5 AND Team = Utah",
+     "select player from table where team = \"Utah\" and no = 5", True, True),
+    # Both match: an operator split by a space is one operator
+    ("SELECT Name FROM table WHERE Goals <= 5", "SELECT Name FROM table WHERE Goals < = 5", True, True),
+    ("SELECT Name FROM table WHERE Goals <> 5", "SELECT Name FROM table WHERE Goals < > 5", True, True),
+    # Both match: symbol-only values normalize to nothing, so a dropped symbol is still a match
+    ("SELECT Name FROM table WHERE Notes = √", "SELECT Name FROM table WHERE Notes = ", True, True),
+    ("SELECT Name FROM table WHERE Notes = √", "SELECT Name FROM table WHERE Notes = ✓", True, True),
+    # Both match: OR terms may come in any order...
+    ("SELECT Name FROM table WHERE Team = Utah OR Year = 2001",
+     "SELECT Name FROM table WHERE Year = 2001 OR Team = Utah", True, True),
+    ("SELECT Name FROM table WHERE Team = Utah AND Rank = 3 OR Year = 2001",
+     "SELECT Name FROM table WHERE Year = 2001 OR Rank = 3 AND Team = Utah", True, True),
+    # ...but AND binds tighter than OR, as in SQL; normalization() applied OR first
+    ("SELECT Name FROM table WHERE Team = Utah AND Rank = 3 OR Year = 2001",
+     "SELECT Name FROM table WHERE Team = Utah AND Year = 2001 OR Rank = 3", True, False),
+    # and AND and OR are never interchangeable
+    ("SELECT Name FROM table WHERE Team = Utah AND Year = 2001",
+     "SELECT Name FROM table WHERE Team = Utah OR Year = 2001", False, False),
+    # Old match, new mismatch: normalization() splits words that start with a keyword ("or lando")
+    ("SELECT Name FROM table WHERE City = Orlando", "SELECT Name FROM table WHERE City = Or lando", True, False),
+    # Old mismatch, new match: optional aggregate parentheses and spacing inside parentheses
+    ("SELECT MAX Points FROM table", "SELECT MAX (Points) FROM table", False, True),
+    ("SELECT Name FROM table WHERE Club = (a)", "SELECT Name FROM table WHERE Club = ( a )", False, True),
+    ("SELECT COUNT Player FROM table WHERE No. = 5", "SELECT COUNT(Player) FROM table WHERE No = 5", False, True),
+    # Old mismatch, new match: a "short film" prefix on the value
+    ("SELECT Director FROM table WHERE Title = short film 2007",
+     "SELECT Director FROM table WHERE Title = 2007", False, True),
+    # Real mistakes stay mistakes
+    ("SELECT COUNT Player FROM table WHERE No. = 5", "SELECT Player FROM table WHERE No. = 5", False, False),
+    ("SELECT Name FROM table WHERE Goals <= 5", "SELECT Name FROM table WHERE Goals < 5", False, False),
+]
+
+@pytest.mark.parametrize("expected, predicted, old, new", CASES)
+def test_sql_match_cases(expected, predicted, old, new):
+    assert sql_match(predicted, expected) == new
+    assert (normalization(predicted) == normalization(expected)) == old
+
+def test_split_operator_is_one_token():
+    assert canonicalize("SELECT a FROM table WHERE b > = 3").conditions == (("b", ">=", "3"),)
+
+def test_parse_sql_keeps_original_text():
+    parsed = parse_sql('SELECT COUNT School/Club Team FROM table WHERE No. < = "5"')
+    assert parsed == ("count", "School/Club Team", "table", (("No.", "<=", "5"),))
+    assert parse_sql("SELECT Notes FROM table WHERE Player = ").conditions == (("Player", "=", ""),)
+
+def test_parse_sql_rejects_or():
+    # WikiSQL has no OR; execution accuracy treats such predictions as unparsable
+    assert parse_sql("SELECT a FROM table WHERE b = 1 OR c = 2") is None
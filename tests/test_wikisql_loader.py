@@ -0,0 +1,32 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from src.wikisql_loader import FIXTURE_DIR, PROJECTED_COLUMNS, WIKISQL_ENV_VAR, load_wikisql, wikisql_file
+
+SPLIT_SIZES = {"train": 40, "validation": 20, "test": 20}
+
+@pytest.mark.parametrize("split", sorted(SPLIT_SIZES))
+def test_projected_split_has_only_requested_columns(split):
+    dataset = load_wikisql(split, FIXTURE_DIR)
+    assert len(dataset) == SPLIT_SIZES[split]
+    assert dataset.column_names == list(PROJECTED_COLUMNS)
+    assert list(dataset.features["table"]) == list(PROJECTED_COLUMNS["table"])
+    example = dataset[0]
+    assert "rows" not in example["table"] and "phase" not in example
+    assert example["sql"]["human_readable"].startswith("SELECT ")
+
+def test_projection_matches_full_rows():
+    full = load_wikisql("validation", FIXTURE_DIR, columns=None)
+    projected = load_wikisql("validation", FIXTURE_DIR, columns={"question": None, "table": ("header",)})
+    assert projected.column_names == ["question", "table"]
+    assert projected["question"] == full["question"]
+    assert [table["header"] for table in projected["table"]] == [table["header"] for table in full["table"]]
+    assert "rows" in full[0]["table"]
+
+def test_data_dir_from_environment(monkeypatch):
+    monkeypatch.setenv(WIKISQL_ENV_VAR, FIXTURE_DIR)
+    assert wikisql_file("test") == os.path.join(FIXTURE_DIR, "wikisql-test.arrow")
+    with pytest.raises(FileNotFoundError):
+        wikisql_file("dev")